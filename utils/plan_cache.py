@@ -0,0 +1,36 @@
+"""
+Plan Cache
+Keeps the empty floor plan figure of the last analysis, so the îlot and
+corridor views of one analysis do not rebuild the walls every time
+"""
+
+import plotly.graph_objects as go
+from typing import Dict, Callable, Optional, Tuple
+
+
+class LastPlanCache:
+    """One-entry cache of the figure built for the most recent analysis result
+
+    An entry is reused only for the very same analysis_data object with the
+    same content counts; callers choose which counts make up the key.
+    """
+
+    def __init__(self):
+        self._analysis_data: Optional[Dict] = None
+        self._counts: Optional[Tuple[int, ...]] = None
+        self._figure: Optional[go.Figure] = None
+
+    def get(self, analysis_data: Dict, counts: Tuple[int, ...],
+            build: Callable[[Dict], go.Figure]) -> go.Figure:
+        """Figure for analysis_data, calling build(analysis_data) on a miss
+
+        Matching on the object itself rather than id() means a freed analysis
+        whose id is reused never hits the entry. Callers add îlots/corridors
+        to the returned figure, so each call hands out a copy.
+        """
+        if analysis_data is not self._analysis_data or counts != self._counts:
+            self._figure = build(analysis_data)
+            self._analysis_data = analysis_data
+            self._counts = counts
+
+        return go.Figure(self._figure)
@@ -5,114 +5,169 @@ with clean styling, proper room labeling, and architectural presentation
 """
 
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import numpy as np
 from typing import Dict, List, Any, Optional
-import colorsys
+from dataclasses import dataclass
+from shapely.geometry import LineString
+
+
+@dataclass(slots=True, frozen=True)
+class _Bounds:
+    """Floor plan extents unpacked once per figure"""
+    min_x: float
+    max_x: float
+    min_y: float
+    max_y: float
+    width: float
+    height: float
+    padding: float  # Axis padding around the plan
+    
+    @classmethod
+    def from_dict(cls, bounds: Dict) -> '_Bounds':
+        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
+        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
+        width = max_x - min_x
+        height = max_y - min_y
+        return cls(min_x, max_x, min_y, max_y, width, height, max(width, height) * 0.15)
+
+
+def _hex_to_rgb(color: str) -> tuple:
+    """Convert a '#rrggbb' color to an (r, g, b) tuple"""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
 
 class ProfessionalFloorPlanVisualizer:
     """Professional floor plan visualizer matching reference image styles"""
     
-    def __init__(self):
-        # Modern architectural color palette
-        self.colors = {
-            'walls': '#2d3748',           # Dark charcoal for walls
-            'floor': '#f8f9fa',           # Light gray floor
-            'restricted': '#fbb6ce',      # Soft pink for restricted areas
-            'entrances': '#9ae6b4',       # Soft green for entrances
-            'room_small': '#fed7d7',      # Light beige/pink for small rooms
-            'room_medium': '#fefcbf',     # Light yellow for medium rooms
-            'room_large': '#c6f6d5',      # Light green for large rooms
-            'room_xlarge': '#e9d8fd',     # Light purple for extra large
-            'corridors': '#bee3f8',       # Light blue for corridors
-            'furniture': '#8b5cf6',       # Purple for furniture
-            'text_dark': '#1a202c',       # Dark text
-            'text_medium': '#4a5568',     # Medium text
-            'text_light': '#718096',      # Light text
-            'accent': '#4299e1',          # Blue accent
-            'background': '#ffffff',      # Pure white
-            'grid': '#e2e8f0'            # Very light grid
-        }
-        
-        # Typography settings
-        self.fonts = {
-            'title': {'family': 'Inter, Arial, sans-serif', 'size': 24, 'color': self.colors['text_dark']},
-            'subtitle': {'family': 'Inter, Arial, sans-serif', 'size': 16, 'color': self.colors['text_medium']},
-            'room_label': {'family': 'Inter, Arial, sans-serif', 'size': 12, 'color': self.colors['text_dark']},
-            'measurement': {'family': 'Inter, Arial, sans-serif', 'size': 10, 'color': self.colors['text_medium']},
-            'legend': {'family': 'Inter, Arial, sans-serif', 'size': 11, 'color': self.colors['text_dark']}
-        }
+    # Modern architectural color palette
+    C_WALLS = '#2d3748'           # Dark charcoal for walls
+    C_FLOOR = '#f8f9fa'           # Light gray floor
+    C_RESTRICTED = '#fbb6ce'      # Soft pink for restricted areas
+    C_ENTRANCES = '#9ae6b4'       # Soft green for entrances
+    C_CORRIDORS = '#bee3f8'       # Light blue for corridors
+    C_FURNITURE = '#8b5cf6'       # Purple for furniture
+    C_TEXT_DARK = '#1a202c'       # Dark text
+    C_TEXT_MEDIUM = '#4a5568'     # Medium text
+    C_TEXT_LIGHT = '#718096'      # Light text
+    C_ACCENT = '#4299e1'          # Blue accent
+    C_BACKGROUND = '#ffffff'      # Pure white
+    C_GRID = '#e2e8f0'            # Very light grid
     
-    def create_professional_floor_plan(self, analysis_data: Dict, ilots: List[Dict] = None, 
-                                     corridors: List[Dict] = None, show_3d: bool = False) -> go.Figure:
-        """Create professional floor plan visualization"""
-        
-        if show_3d:
-            return self._create_3d_floor_plan(analysis_data, ilots, corridors)
-        else:
-            return self._create_2d_floor_plan(analysis_data, ilots, corridors)
+    # Typography settings
+    FONT_TITLE = {'family': 'Inter, Arial, sans-serif', 'size': 24, 'color': C_TEXT_DARK}
+    FONT_SUBTITLE = {'family': 'Inter, Arial, sans-serif', 'size': 16, 'color': C_TEXT_MEDIUM}
+    FONT_ROOM_LABEL = {'family': 'Inter, Arial, sans-serif', 'size': 12, 'color': C_TEXT_DARK}
+    FONT_MEASUREMENT = {'family': 'Inter, Arial, sans-serif', 'size': 10, 'color': C_TEXT_MEDIUM}
+    FONT_LEGEND = {'family': 'Inter, Arial, sans-serif', 'size': 11, 'color': C_TEXT_DARK}
     
-    def _create_2d_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict]) -> go.Figure:
-        """Create modern 2D floor plan with architectural styling"""
-        
-        fig = go.Figure()
-        
-        # Set up professional layout
-        bounds = analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100})
-        
-        # Add floor background
-        self._add_floor_background(fig, bounds)
-        
-        # Add walls with proper thickness and styling
-        self._add_professional_walls(fig, analysis_data.get('walls', []))
-        
-        # Add rooms/zones with modern colors and labels
-        self._add_professional_rooms(fig, ilots or [])
-        
-        # Add entrances with clear marking
-        self._add_professional_entrances(fig, analysis_data.get('entrances', []))
-        
-        # Add corridors with proper styling
-        if corridors:
-            self._add_professional_corridors(fig, corridors)
-        
-        # Add measurements and dimensions
-        self._add_professional_measurements(fig, bounds, ilots or [])
-        
-        # Set professional layout and styling
-        self._apply_professional_layout(fig, bounds)
-        
-        return fig
+    # Room colors by size category
+    ROOM_COLORS = {
+        'small': '#fed7d7',      # Light pink for small (0-1 m²)
+        'medium': '#fefcbf',     # Light yellow for medium (1-3 m²)
+        'large': '#c6f6d5',      # Light green for large (3-5 m²)
+        'xlarge': '#e9d8fd'      # Light purple for xlarge (5-10 m²)
+    }
     
-    def _create_3d_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict]) -> go.Figure:
-        """Create realistic 3D architectural visualization like reference image"""
-        
-        fig = go.Figure()
-        
-        bounds = analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100})
-        
-        # Add realistic floor foundation
-        self._add_3d_foundation(fig, bounds)
-        
-        # Create detailed 3D room volumes with realistic textures
-        if ilots:
-            for i, room in enumerate(ilots):
-                self._add_realistic_3d_room(fig, room, i)
-        
-        # Add realistic 3D walls with thickness and texture
-        self._add_realistic_3d_walls(fig, analysis_data.get('walls', []))
-        
-        # Add furniture and interior details
-        if ilots:
-            self._add_3d_furniture(fig, ilots)
-        
-        # Add corridor pathways
-        if corridors:
-            self._add_3d_corridors(fig, corridors)
+    # 3D furniture colors
+    FURNITURE_COLORS = {
+        'desk': '#8b4513',        # Saddle brown
+        'chair': '#654321',       # Dark brown
+        'bed': '#daa520',         # Goldenrod
+        'cabinet': '#a0522d',     # Sienna
+        'decoration': '#228b22'   # Forest green for plants
+    }
+    
+    # Size ranges shown in the legend for each category
+    SIZE_RANGES = {
+        'small': '0-1 m²',
+        'medium': '1-3 m²',
+        'large': '3-5 m²',
+        'xlarge': '5-10 m²'
+    }
+    
+    # Line break between paths merged into a single trace
+    _BREAK = np.array([np.nan], dtype=np.float64)
+    
+    # Unit box corners (bottom 0-3, top 4-7), scaled and offset per box
+    _UNIT_BOX_VERTS = np.array([
+        [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+        [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]
+    ], dtype=np.float64)
+    
+    # Box vertex order tracing all 12 edges, -1 marks a line break
+    _BOX_OUTLINE = np.array([0, 1, 2, 3, 0, 4, 5, 6, 7, 4, -1, 1, 5, -1, 2, 6, -1, 3, 7, -1])
+    
+    # Triangle indices for a closed 8-vertex box
+    _BOX_FACES = np.array([
+        [0, 1, 2], [0, 2, 3],    # Bottom
+        [4, 5, 6], [4, 6, 7],    # Top
+        [0, 1, 5], [0, 5, 4],    # Sides
+        [1, 2, 6], [1, 6, 5],
+        [2, 3, 7], [2, 7, 6],
+        [3, 0, 4], [3, 4, 7]
+    ], dtype=np.int32)
+    _BOX_FACE_COLUMNS = np.ascontiguousarray(_BOX_FACES.T)
+    
+    def __init__(self, webgl: bool = True):
+        # 2D traces render through WebGL unless SVG output is requested
+        self._scatter_type = 'scattergl' if webgl else 'scatter'
+        
+        # Room colors as uint8 RGB for per-vertex mesh coloring
+        self._room_rgb = {
+            size_cat: np.array(_hex_to_rgb(color), dtype=np.uint8)
+            for size_cat, color in self.ROOM_COLORS.items()
+        }
         
-        # Set professional 3D layout matching reference image quality
-        fig.update_layout(
+        # Static layout parts, built once; per-figure ranges and shapes are merged in
+        self._base_2d_layout = dict(
+            title={
+                'text': "Professional Floor Plan",
+                'x': 0.5,
+                'y': 0.95,
+                'xanchor': 'center',
+                'yanchor': 'top',
+                'font': self.FONT_TITLE
+            },
+            paper_bgcolor=self.C_BACKGROUND,
+            plot_bgcolor=self.C_BACKGROUND,
+            width=1200,
+            height=900,
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=-0.15,
+                xanchor="center",
+                x=0.5,
+                bgcolor="rgba(255,255,255,0.9)",
+                bordercolor=self.C_GRID,
+                borderwidth=1,
+                font=self.FONT_LEGEND
+            ),
+            xaxis=dict(
+                showgrid=True,
+                gridcolor=self.C_GRID,
+                gridwidth=1,
+                zeroline=False,
+                showticklabels=True,
+                title="Width (m)",
+                title_font=self.FONT_MEASUREMENT,
+                tickfont=self.FONT_MEASUREMENT,
+                scaleanchor="y",
+                scaleratio=1
+            ),
+            yaxis=dict(
+                showgrid=True,
+                gridcolor=self.C_GRID,
+                gridwidth=1,
+                zeroline=False,
+                showticklabels=True,
+                title="Height (m)",
+                title_font=self.FONT_MEASUREMENT,
+                tickfont=self.FONT_MEASUREMENT
+            )
+        )
+        self._base_3d_layout = dict(
             scene=dict(
                 camera=dict(
                     eye=dict(x=2.2, y=2.2, z=1.8),  # Better elevated angle
@@ -162,98 +217,241 @@ class ProfessionalFloorPlanVisualizer:
             height=800,
             margin=dict(l=0, r=0, t=50, b=0)
         )
+    
+    def create_professional_floor_plan(self, analysis_data: Dict, ilots: List[Dict] = None, 
+                                     corridors: List[Dict] = None, show_3d: bool = False,
+                                     max_rooms: int = 300, max_walls: int = 2000) -> go.Figure:
+        """Create professional floor plan visualization
+        
+        In 3D, more than max_rooms rooms are merged into one mesh per size
+        category, and walls with more than max_walls segments in total are
+        simplified before extrusion, keeping the figure size bounded.
+        """
         
-        return fig
+        if show_3d:
+            return self._create_3d_floor_plan(analysis_data, ilots, corridors, max_rooms, max_walls)
+        else:
+            return self._create_2d_floor_plan(analysis_data, ilots, corridors)
     
-    def _add_floor_background(self, fig: go.Figure, bounds: Dict):
-        """Add floor background with subtle texture"""
-        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
-        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
+    def _create_2d_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict]) -> go.Figure:
+        """Create modern 2D floor plan with architectural styling"""
+        
+        # Traces are built as plain dicts and validated once by go.Figure
+        traces = []
+        
+        # Set up professional layout
+        bounds = _Bounds.from_dict(analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100}))
+        
+        # Shapes and annotations are collected here and attached with the layout,
+        # avoiding per-item add_shape/add_annotation validation
+        shapes = []
+        annotations = []
+        
+        # Room columns (structure of arrays) shared by the room and measurement helpers
+        rooms_soa = self._rooms_soa(self._valid_rooms(ilots or []))
+        
+        # Add floor background
+        self._add_floor_background(shapes, bounds)
+        
+        # Add walls with proper thickness and styling
+        self._add_professional_walls(traces, analysis_data.get('walls', []))
+        
+        # Add rooms/zones with modern colors and labels
+        self._add_professional_rooms(rooms_soa, shapes, annotations)
+        
+        # Add entrances with clear marking
+        self._add_professional_entrances(traces, analysis_data.get('entrances', []))
+        
+        # Add corridors with proper styling
+        if corridors:
+            self._add_professional_corridors(traces, corridors)
+        
+        # Add measurements and dimensions
+        self._add_professional_measurements(annotations, bounds, rooms_soa)
+        
+        # Set professional layout and styling
+        layout = self._build_professional_layout(bounds, shapes, annotations)
+        
+        return go.Figure(data=traces, layout=layout)
+    
+    def _create_3d_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict],
+                              max_rooms: int = 300, max_walls: int = 2000) -> go.Figure:
+        """Create realistic 3D architectural visualization like reference image"""
+        
+        traces = []
+        
+        bounds = _Bounds.from_dict(analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100}))
+        
+        # Add realistic floor foundation
+        self._add_3d_foundation(traces, bounds)
+        
+        ilots = self._valid_rooms(ilots or [])
+        rooms_soa = self._rooms_soa(ilots)
+        detailed_rooms = bool(ilots) and len(ilots) <= max_rooms
+        
+        # Create detailed 3D room volumes with realistic textures
+        if detailed_rooms:
+            self._add_3d_room_volumes(traces, rooms_soa)
+            self._add_3d_room_labels(traces, rooms_soa)
+        elif ilots:
+            # Too many rooms for per-room detail: one mesh per size category
+            self._add_3d_room_categories(traces, rooms_soa)
+        
+        # Add realistic 3D walls with thickness and texture
+        walls = analysis_data.get('walls', [])
+        if sum(max(len(wall) - 1, 0) for wall in walls) > max_walls:
+            walls = self._simplify_walls(walls, max(bounds.width, bounds.height) * 1e-3)
+        self._add_realistic_3d_walls(traces, walls)
+        
+        # Add furniture and interior details
+        if detailed_rooms:
+            self._add_3d_furniture(traces, ilots)
+        
+        # Add corridor pathways
+        if corridors:
+            self._add_3d_corridors(traces, corridors)
         
+        # Set professional 3D layout matching reference image quality
+        return go.Figure(data=traces, layout=self._base_3d_layout)
+    
+    @staticmethod
+    def _trace(type_: str, **kwargs) -> Dict:
+        """Build a trace as a plain dict, skipping graph_objects validation per call"""
+        return {'type': type_, **kwargs}
+    
+    @staticmethod
+    def _valid_rooms(rooms: List[Dict]) -> List[Dict]:
+        """Rooms with a positive footprint, zero-area rooms produce no geometry"""
+        return [room for room in rooms if room.get('width', 3) > 0 and room.get('height', 2) > 0]
+    
+    @staticmethod
+    def _rooms_soa(rooms: List[Dict]) -> Dict[str, np.ndarray]:
+        """Convert room dicts to per-field arrays (x, y, w, h, area, label, cat)"""
+        n = len(rooms)
+        widths = np.fromiter((room.get('width', 3) for room in rooms), dtype=np.float64, count=n)
+        heights = np.fromiter((room.get('height', 2) for room in rooms), dtype=np.float64, count=n)
+        areas = np.fromiter((room.get('area', np.nan) for room in rooms), dtype=np.float64, count=n)
+        areas = np.where(np.isnan(areas), widths * heights, areas)
+        
+        return {
+            'x': np.fromiter((room.get('x', 0) for room in rooms), dtype=np.float64, count=n),
+            'y': np.fromiter((room.get('y', 0) for room in rooms), dtype=np.float64, count=n),
+            'w': widths,
+            'h': heights,
+            'area': areas,
+            'label': np.char.mod('%.1f', areas),  # Area formatted once for all labels
+            'cat': np.array([room.get('size_category', 'medium') for room in rooms], dtype=str)
+        }
+    
+    @staticmethod
+    def _xy(points) -> tuple:
+        """Split a polyline into contiguous float64 x and y coordinate arrays"""
+        a = np.asarray(points, dtype=np.float64)
+        return np.ascontiguousarray(a[:, 0]), np.ascontiguousarray(a[:, 1])
+    
+    @staticmethod
+    def _columns(a: np.ndarray) -> np.ndarray:
+        """Columns of an (n, 3) vertex or face array as contiguous rows"""
+        return np.ascontiguousarray(a.T)
+    
+    @classmethod
+    def _fused_box_faces(cls, n: int) -> np.ndarray:
+        """Face indices for n boxes stored back to back in one vertex array"""
+        return (cls._BOX_FACES + (np.arange(n, dtype=np.int32) * 8)[:, None, None]).reshape(-1, 3)
+    
+    def _add_floor_background(self, shapes: List[Dict], bounds: _Bounds):
+        """Add floor background with subtle texture"""
         # Add floor rectangle
-        fig.add_shape(
+        shapes.append(dict(
             type="rect",
-            x0=min_x, y0=min_y, x1=max_x, y1=max_y,
-            fillcolor=self.colors['floor'],
-            line=dict(color=self.colors['walls'], width=2),
+            x0=bounds.min_x, y0=bounds.min_y, x1=bounds.max_x, y1=bounds.max_y,
+            fillcolor=self.C_FLOOR,
+            line=dict(color=self.C_WALLS, width=2),
             layer="below"
-        )
+        ))
     
-    def _add_professional_walls(self, fig: go.Figure, walls: List):
+    def _add_professional_walls(self, traces: List[Dict], walls: List):
         """Add walls with professional thickness and styling"""
+        # All walls share one trace; NaN breaks the line between walls
+        xs = []
+        ys = []
+        
         for wall in walls:
             if len(wall) >= 2:
-                x_coords = []
-                y_coords = []
-                
-                for point in wall:
-                    if isinstance(point, (list, tuple)) and len(point) >= 2:
-                        x_coords.append(point[0])
-                        y_coords.append(point[1])
+                points = [point[:2] for point in wall
+                          if isinstance(point, (list, tuple)) and len(point) >= 2]
                 
-                if len(x_coords) >= 2:
+                if len(points) >= 2:
+                    # Drop repeated consecutive points
+                    pts = np.asarray(points, dtype=np.float64)
+                    pts = pts[np.r_[True, np.any(np.diff(pts, axis=0) != 0, axis=1)]]
+                    if len(pts) < 2:
+                        continue
+                    
                     # Close the wall if it's a polygon
-                    if len(x_coords) > 2:
-                        x_coords.append(x_coords[0])
-                        y_coords.append(y_coords[0])
+                    if len(pts) > 2:
+                        pts = np.vstack([pts, pts[:1]])
                     
-                    fig.add_trace(go.Scatter(
-                        x=x_coords,
-                        y=y_coords,
-                        mode='lines',
-                        line=dict(
-                            color=self.colors['walls'],
-                            width=4
-                        ),
-                        name='Walls',
-                        showlegend=True,
-                        hoverinfo='name'
-                    ))
-    
-    def _add_professional_rooms(self, fig: go.Figure, rooms: List[Dict]):
+                    xs += [pts[:, 0], self._BREAK]
+                    ys += [pts[:, 1], self._BREAK]
+        
+        if xs:
+            traces.append(self._trace(self._scatter_type,
+                x=np.concatenate(xs),
+                y=np.concatenate(ys),
+                mode='lines',
+                line=dict(
+                    color=self.C_WALLS,
+                    width=4
+                ),
+                name='Walls',
+                showlegend=True,
+                hoverinfo='name'
+            ))
+    
+    def _add_professional_rooms(self, rooms: Dict[str, np.ndarray],
+                                shapes: List[Dict], annotations: List[Dict]):
         """Add rooms with modern colors and professional labels"""
-        room_types = {}
+        # Group rooms by size category with one sort; categories keep first-seen order
+        cats, first, inverse = np.unique(rooms['cat'], return_index=True, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        counts = np.bincount(inverse, minlength=len(cats))
+        ends = np.cumsum(counts)
         
-        for room in rooms:
-            size_cat = room.get('size_category', 'medium')
-            
-            # Group by size category for legend
-            if size_cat not in room_types:
-                room_types[size_cat] = []
-            room_types[size_cat].append(room)
+        xs, ys = rooms['x'][order].tolist(), rooms['y'][order].tolist()
+        widths, heights = rooms['w'][order].tolist(), rooms['h'][order].tolist()
+        labels = [label + ' m²' for label in rooms['label'][order].tolist()]
         
         # Add rooms by category with proper color coding
-        for size_cat, room_list in room_types.items():
-            # Map size categories to proper colors
-            color_map = {
-                'small': '#fed7d7',      # Light pink for small (0-1 m²)
-                'medium': '#fefcbf',     # Light yellow for medium (1-3 m²)
-                'large': '#c6f6d5',      # Light green for large (3-5 m²)
-                'xlarge': '#e9d8fd'      # Light purple for xlarge (5-10 m²)
-            }
-            color = color_map.get(size_cat, self.colors['room_medium'])
+        for c in np.argsort(first):
+            size_cat = str(cats[c])
+            sl = slice(int(ends[c] - counts[c]), int(ends[c]))
+            color = self.ROOM_COLORS.get(size_cat, self.ROOM_COLORS['medium'])
             
-            for i, room in enumerate(room_list):
-                x = room.get('x', 0)
-                y = room.get('y', 0)
-                width = room.get('width', 3)
-                height = room.get('height', 2)
-                area = room.get('area', width * height)
-                
-                # Add room rectangle with proper color
-                fig.add_shape(
+            # Add room rectangles with proper color; the first one carries the legend entry
+            start = len(shapes)
+            shapes.extend([
+                dict(
                     type="rect",
                     x0=x, y0=y, x1=x+width, y1=y+height,
                     fillcolor=color,
-                    line=dict(color=self.colors['walls'], width=2),
+                    line=dict(color=self.C_WALLS, width=2),
                     opacity=0.9
                 )
-                
-                # Add room label with area
-                fig.add_annotation(
+                for x, y, width, height in zip(xs[sl], ys[sl], widths[sl], heights[sl])
+            ])
+            shapes[start].update(
+                name=f'{self.SIZE_RANGES.get(size_cat, size_cat)} ({int(counts[c])})',
+                legendgroup=size_cat,
+                showlegend=True
+            )
+            
+            # Add room labels with area
+            annotations.extend([
+                dict(
                     x=x + width/2,
                     y=y + height/2,
-                    text=f"{area:.1f} m²",
+                    text=label,
                     showarrow=False,
                     font=dict(
                         family='Inter, Arial, sans-serif', 
@@ -261,243 +459,229 @@ class ProfessionalFloorPlanVisualizer:
                         color='#1a202c'
                     ),
                     bgcolor="rgba(255,255,255,0.9)",
-                    bordercolor=self.colors['text_dark'],
+                    bordercolor=self.C_TEXT_DARK,
                     borderwidth=1,
                     borderpad=4
                 )
-            
-            # Add legend entry with proper color
-            if room_list:
-                size_range_map = {
-                    'small': '0-1 m²',
-                    'medium': '1-3 m²', 
-                    'large': '3-5 m²',
-                    'xlarge': '5-10 m²'
-                }
-                size_range = size_range_map.get(size_cat, size_cat)
-                
-                fig.add_trace(go.Scatter(
-                    x=[None], y=[None],
-                    mode='markers',
-                    marker=dict(
-                        color=color,
-                        size=15,
-                        symbol='square'
-                    ),
-                    name=f'{size_range} ({len(room_list)})',
-                    showlegend=True
-                ))
+                for x, y, width, height, label in zip(xs[sl], ys[sl], widths[sl], heights[sl], labels[sl])
+            ])
     
-    def _add_professional_entrances(self, fig: go.Figure, entrances: List):
+    def _add_professional_entrances(self, traces: List[Dict], entrances: List):
         """Add entrances with clear architectural symbols"""
-        for i, entrance in enumerate(entrances):
+        xs = []
+        ys = []
+        
+        for entrance in entrances:
             if len(entrance) >= 2:
-                x_coords = [point[0] for point in entrance]
-                y_coords = [point[1] for point in entrance]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines+markers',
-                    line=dict(
-                        color=self.colors['entrances'],
-                        width=6
-                    ),
-                    marker=dict(
-                        color=self.colors['entrances'],
-                        size=10,
-                        symbol='diamond'
-                    ),
-                    name='Entrances' if i == 0 else None,
-                    showlegend=(i == 0),
-                    hoverinfo='name'
-                ))
+                x, y = self._xy(entrance)
+                xs += [x, self._BREAK]
+                ys += [y, self._BREAK]
+        
+        if xs:
+            traces.append(self._trace(self._scatter_type,
+                x=np.concatenate(xs),
+                y=np.concatenate(ys),
+                mode='lines+markers',
+                line=dict(
+                    color=self.C_ENTRANCES,
+                    width=6
+                ),
+                marker=dict(
+                    color=self.C_ENTRANCES,
+                    size=10,
+                    symbol='diamond'
+                ),
+                name='Entrances',
+                showlegend=True,
+                hoverinfo='name'
+            ))
     
-    def _add_professional_corridors(self, fig: go.Figure, corridors: List[Dict]):
+    def _add_professional_corridors(self, traces: List[Dict], corridors: List[Dict]):
         """Add corridors with modern architectural styling"""
-        for i, corridor in enumerate(corridors):
+        xs = []
+        ys = []
+        
+        for corridor in corridors:
             path = corridor.get('path', [])
             if len(path) >= 2:
-                x_coords = [point[0] for point in path]
-                y_coords = [point[1] for point in path]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines',
-                    line=dict(
-                        color=self.colors['corridors'],
-                        width=3,
-                        dash='dot'
-                    ),
-                    name='Corridors' if i == 0 else None,
-                    showlegend=(i == 0),
-                    hoverinfo='name'
-                ))
+                x, y = self._xy(path)
+                xs += [x, self._BREAK]
+                ys += [y, self._BREAK]
+        
+        if xs:
+            traces.append(self._trace(self._scatter_type,
+                x=np.concatenate(xs),
+                y=np.concatenate(ys),
+                mode='lines',
+                line=dict(
+                    color=self.C_CORRIDORS,
+                    width=3,
+                    dash='dot'
+                ),
+                name='Corridors',
+                showlegend=True,
+                hoverinfo='name'
+            ))
     
-    def _add_professional_measurements(self, fig: go.Figure, bounds: Dict, rooms: List[Dict]):
+    def _add_professional_measurements(self, annotations: List[Dict], bounds: _Bounds,
+                                       rooms: Dict[str, np.ndarray]):
         """Add professional measurements and dimensions"""
-        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
-        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
-        
-        width = max_x - min_x
-        height = max_y - min_y
+        min_x, max_x = bounds.min_x, bounds.max_x
+        min_y, max_y = bounds.min_y, bounds.max_y
+        width, height = bounds.width, bounds.height
         
         # Add overall dimensions
-        fig.add_annotation(
+        annotations.append(dict(
             x=(min_x + max_x) / 2,
             y=min_y - height * 0.08,
             text=f"{width:.1f}m",
             showarrow=False,
-            font=self.fonts['measurement'],
+            font=self.FONT_MEASUREMENT,
             bgcolor="rgba(255,255,255,0.9)",
-            bordercolor=self.colors['accent'],
+            bordercolor=self.C_ACCENT,
             borderwidth=1
-        )
+        ))
         
-        fig.add_annotation(
+        annotations.append(dict(
             x=min_x - width * 0.08,
             y=(min_y + max_y) / 2,
             text=f"{height:.1f}m",
             showarrow=False,
             textangle=-90,
-            font=self.fonts['measurement'],
+            font=self.FONT_MEASUREMENT,
             bgcolor="rgba(255,255,255,0.9)",
-            bordercolor=self.colors['accent'],
+            bordercolor=self.C_ACCENT,
             borderwidth=1
-        )
+        ))
         
         # Add room measurements
-        total_area = sum(room.get('area', 0) for room in rooms)
+        total_area = float(rooms['area'].sum())
         if total_area > 0:
-            fig.add_annotation(
+            annotations.append(dict(
                 x=max_x,
                 y=max_y + height * 0.05,
                 text=f"Total Area: {total_area:.1f} m²",
                 showarrow=False,
-                font=self.fonts['subtitle'],
+                font=self.FONT_SUBTITLE,
                 bgcolor="rgba(255,255,255,0.95)",
-                bordercolor=self.colors['accent'],
+                bordercolor=self.C_ACCENT,
                 borderwidth=2,
                 xanchor='right'
-            )
+            ))
     
-    def _add_realistic_3d_room(self, fig: go.Figure, room: Dict, index: int):
-        """Add realistic 3D room with solid architectural structures"""
-        x = room.get('x', 0)
-        y = room.get('y', 0)
-        width = room.get('width', 3)
-        height = room.get('height', 2)
+    def _room_boxes(self, rooms: Dict[str, np.ndarray]) -> tuple:
+        """Vertices and faces of the 3D boxes for room columns"""
         z_height = 3.2  # Realistic room height
-        
-        size_cat = room.get('size_category', 'medium')
-        
-        # Realistic color scheme based on room type
-        room_colors = {
-            'small': '#fed7d7',      # Light red/pink for small rooms
-            'medium': '#fefcbf',     # Light yellow for medium
-            'large': '#c6f6d5',      # Light green for large
-            'xlarge': '#e9d8fd'      # Light purple for xlarge
-        }
-        
-        # Floor colors for variety
-        floor_colors = {
-            'small': '#f7fafc',      # Very light gray
-            'medium': '#f7fafc',     # Very light gray
-            'large': '#f7fafc',      # Very light gray
-            'xlarge': '#f7fafc'      # Very light gray
-        }
-        
-        room_color = room_colors.get(size_cat, '#fefcbf')
-        floor_color = floor_colors.get(size_cat, '#f7fafc')
-        
-        # Create room as solid 3D box structure
-        vertices_x = [x, x+width, x+width, x, x, x+width, x+width, x]
-        vertices_y = [y, y, y+height, y+height, y, y, y+height, y+height]
-        vertices_z = [0, 0, 0, 0, z_height, z_height, z_height, z_height]
-        
-        # Define faces for proper 3D room structure
-        i = [0, 0, 0, 4, 4, 2]  # Face indices
-        j = [1, 2, 3, 5, 6, 6]
-        k = [2, 3, 0, 6, 7, 3]
-        
-        # Add room structure as 3D mesh
-        fig.add_trace(go.Mesh3d(
-            x=vertices_x,
-            y=vertices_y,
-            z=vertices_z,
-            i=i,
-            j=j,
-            k=k,
-            color=room_color,
+        n = len(rooms['x'])
+        
+        # Per-room origin (x, y, 0) and size (width, height, z_height)
+        origins = np.zeros((n, 3), dtype=np.float64)
+        origins[:, 0] = rooms['x']
+        origins[:, 1] = rooms['y']
+        sizes = np.full((n, 3), z_height, dtype=np.float64)
+        sizes[:, 0] = rooms['w']
+        sizes[:, 1] = rooms['h']
+        
+        verts = (self._UNIT_BOX_VERTS * sizes[:, None, :] + origins[:, None, :]).reshape(-1, 3)
+        return verts, self._fused_box_faces(n)
+    
+    def _add_3d_room_categories(self, traces: List[Dict], rooms: Dict[str, np.ndarray]):
+        """Add rooms as one aggregate mesh per size category"""
+        cats, first = np.unique(rooms['cat'], return_index=True)
+        
+        for size_cat in cats[np.argsort(first)].tolist():
+            mask = rooms['cat'] == size_cat
+            verts, faces = self._room_boxes({key: column[mask] for key, column in rooms.items()})
+            x, y, z = self._columns(verts)
+            i, j, k = self._columns(faces)
+            traces.append(self._trace('mesh3d',
+                x=x, y=y, z=z,
+                i=i, j=j, k=k,
+                color=self.ROOM_COLORS.get(size_cat, '#fefcbf'),
+                opacity=0.8,
+                name=f'{self.SIZE_RANGES.get(size_cat, size_cat)} ({int(mask.sum())})',
+                showlegend=True,
+                hoverinfo='name'
+            ))
+    
+    def _simplify_walls(self, walls: List, tolerance: float) -> List:
+        """Decimate wall polylines with Douglas-Peucker simplification"""
+        simplified = []
+        for wall in walls:
+            if len(wall) > 2:
+                wall = list(LineString([point[:2] for point in wall]).simplify(tolerance).coords)
+            simplified.append(wall)
+        return simplified
+    
+    def _add_3d_room_volumes(self, traces: List[Dict], rooms: Dict[str, np.ndarray]):
+        """Add all room volumes as one fused box mesh colored per vertex, plus outlines"""
+        verts, faces = self._room_boxes(rooms)
+        cats, inverse = np.unique(rooms['cat'], return_inverse=True)
+        palette = np.array([self._room_rgb.get(size_cat, self._room_rgb['medium'])
+                            for size_cat in cats.tolist()], dtype=np.uint8).reshape(-1, 3)
+        colors = np.repeat(palette[inverse], 8, axis=0)  # Each room's 8 vertices share its color
+        x, y, z = self._columns(verts)
+        i, j, k = self._columns(faces)
+        
+        # Add room structures as a single 3D mesh
+        traces.append(self._trace('mesh3d',
+            x=x, y=y, z=z,
+            i=i, j=j, k=k,
+            vertexcolor=colors,
             opacity=0.8,
+            name=f'Rooms ({len(rooms["x"])})',
             showlegend=False,
             hoverinfo='skip'
         ))
         
-        # Add floor surface
-        fig.add_trace(go.Mesh3d(
-            x=[x, x+width, x+width, x],
-            y=[y, y, y+height, y+height],
-            z=[0, 0, 0, 0],
-            i=[0, 0],
-            j=[1, 2],
-            k=[2, 3],
-            color=floor_color,
-            opacity=0.9,
-            showlegend=False,
-            hoverinfo='skip'
-        ))
+        # The fused mesh has no per-category legend, so add a legend-only entry per size category
+        present = set(cats.tolist())
+        for size_cat in [cat for cat in self.SIZE_RANGES if cat in present] + sorted(present - set(self.SIZE_RANGES)):
+            traces.append(self._trace('scatter3d',
+                x=[None], y=[None], z=[None],
+                mode='markers',
+                marker=dict(color=self.ROOM_COLORS.get(size_cat, self.ROOM_COLORS['medium']), size=8),
+                name=self.SIZE_RANGES.get(size_cat, size_cat),
+                legendgroup=size_cat,
+                showlegend=True
+            ))
+        
+        # Add every room outline through one line trace for better definition
+        outlines = verts.reshape(-1, 8, 3)[:, self._BOX_OUTLINE]
+        outlines[:, self._BOX_OUTLINE < 0] = np.nan
+        x, y, z = self._columns(outlines.reshape(-1, 3))
         
-        # Add room outline for better definition
-        fig.add_trace(go.Scatter3d(
-            x=[x, x+width, x+width, x, x, x, x+width, x+width, x, x, x+width, x+width, x+width, x, x],
-            y=[y, y, y+height, y+height, y, y, y, y+height, y+height, y, y, y+height, y+height, y+height, y],
-            z=[0, 0, 0, 0, 0, z_height, z_height, z_height, z_height, z_height, 0, 0, z_height, z_height, 0],
+        traces.append(self._trace('scatter3d',
+            x=x, y=y, z=z,
             mode='lines',
+            connectgaps=False,
             line=dict(color='#2d3748', width=2),
             showlegend=False,
             hoverinfo='skip'
         ))
+    
+    def _add_3d_room_labels(self, traces: List[Dict], rooms: Dict[str, np.ndarray]):
+        """Add area labels for all rooms in 3D space"""
+        z_height = 3.2  # Realistic room height
         
-        # Add room label in 3D space
-        fig.add_trace(go.Scatter3d(
-            x=[x + width/2],
-            y=[y + height/2],
-            z=[z_height + 0.2],
+        traces.append(self._trace('scatter3d',
+            x=(rooms['x'] + rooms['w'] / 2).astype(np.float64),
+            y=(rooms['y'] + rooms['h'] / 2).astype(np.float64),
+            z=np.full(len(rooms['x']), z_height + 0.2, dtype=np.float64),
             mode='text',
-            text=[f"{room.get('area', width*height):.1f}m²"],
+            text=[label + 'm²' for label in rooms['label'].tolist()],
             textfont=dict(size=14, color='#2d3748', family='Arial'),
             showlegend=False,
             hoverinfo='skip'
         ))
-        
-        # Legend entry for room type
-        size_range_map = {
-            'small': '0-1 m²',
-            'medium': '1-3 m²', 
-            'large': '3-5 m²',
-            'xlarge': '5-10 m²'
-        }
-        
-        if index < 4:  # Only show legend for first few rooms
-            size_range = size_range_map.get(size_cat, size_cat)
-            fig.add_trace(go.Scatter3d(
-                x=[None], y=[None], z=[None],
-                mode='markers',
-                marker=dict(color=room_color, size=8),
-                name=f'{size_range}',
-                showlegend=True
-            ))
     
-    def _add_3d_foundation(self, fig: go.Figure, bounds: Dict):
+    def _add_3d_foundation(self, traces: List[Dict], bounds: _Bounds):
         """Add realistic foundation/ground plane based on actual floor plan bounds"""
-        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
-        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
+        min_x, max_x = bounds.min_x, bounds.max_x
+        min_y, max_y = bounds.min_y, bounds.max_y
         
         # Use actual dimensions, not fixed mock values
-        width = max_x - min_x
-        height = max_y - min_y
+        width, height = bounds.width, bounds.height
         
         if width <= 0 or height <= 0:
             return  # Skip if invalid bounds
@@ -505,67 +689,66 @@ class ProfessionalFloorPlanVisualizer:
         # Proportional padding based on actual size
         padding = max(1.0, min(width, height) * 0.1)
         
-        fig.add_trace(go.Mesh3d(
-            x=[min_x-padding, max_x+padding, max_x+padding, min_x-padding],
-            y=[min_y-padding, min_y-padding, max_y+padding, max_y+padding],
-            z=[-0.2, -0.2, -0.2, -0.2],
+        traces.append(self._trace('mesh3d',
+            x=np.array([min_x-padding, max_x+padding, max_x+padding, min_x-padding], dtype=np.float64),
+            y=np.array([min_y-padding, min_y-padding, max_y+padding, max_y+padding], dtype=np.float64),
+            z=np.full(4, -0.2, dtype=np.float64),
             color='#e8e8e8',
             opacity=0.4,
             showlegend=False,
             hoverinfo='skip'
         ))
         
-    def _add_realistic_3d_walls(self, fig: go.Figure, walls: List):
+    def _add_realistic_3d_walls(self, traces: List[Dict], walls: List):
         """Add realistic 3D walls with proper thickness and structure"""
         wall_height = 3.2
         wall_thickness = 0.3
         
+        # Footprint quads (start, end, end+normal, start+normal) of every segment
+        quads = []
+        
         for wall in walls:
             if len(wall) >= 2:
-                for i in range(len(wall) - 1):
-                    x1, y1 = wall[i][0], wall[i][1]
-                    x2, y2 = wall[i+1][0], wall[i+1][1]
-                    
-                    # Calculate wall normal for thickness
-                    dx = x2 - x1
-                    dy = y2 - y1
-                    length = (dx**2 + dy**2)**0.5
-                    if length > 0:
-                        nx = -dy / length * wall_thickness
-                        ny = dx / length * wall_thickness
-                        
-                        # Create wall volume with proper faces
-                        wall_vertices_x = [x1, x2, x2+nx, x1+nx, x1, x2, x2+nx, x1+nx]
-                        wall_vertices_y = [y1, y2, y2+ny, y1+ny, y1, y2, y2+ny, y1+ny]
-                        wall_vertices_z = [0, 0, 0, 0, wall_height, wall_height, wall_height, wall_height]
-                        
-                        # Define faces for proper 3D wall structure
-                        i_faces = [0, 0, 0, 4, 4, 2]
-                        j_faces = [1, 2, 3, 5, 6, 6]
-                        k_faces = [2, 3, 0, 6, 7, 3]
-                        
-                        fig.add_trace(go.Mesh3d(
-                            x=wall_vertices_x,
-                            y=wall_vertices_y,
-                            z=wall_vertices_z,
-                            i=i_faces,
-                            j=j_faces,
-                            k=k_faces,
-                            color='#8b7355',  # Realistic wall color
-                            opacity=0.9,
-                            showlegend=False,
-                            hoverinfo='skip'
-                        ))
-    
-    def _add_3d_furniture(self, fig: go.Figure, rooms: List[Dict]):
+                pts = np.asarray(wall, dtype=np.float64)[:, :2]
+                seg = pts[1:] - pts[:-1]
+                lengths = np.hypot(seg[:, 0], seg[:, 1])
+                keep = lengths > 0
+                if not keep.any():
+                    continue
+                
+                start, end = pts[:-1][keep], pts[1:][keep]
+                
+                # Calculate wall normals for thickness
+                normals = seg[keep][:, ::-1] * (-1, 1) / lengths[keep][:, None] * wall_thickness
+                quads.append(np.stack([start, end, end + normals, start + normals], axis=1))
+        
+        if not quads:
+            return
+        
+        quads = np.concatenate(quads)
+        n = len(quads)
+        
+        # Extrude each footprint into an 8-vertex wall volume
+        verts = np.empty((n, 8, 3), dtype=np.float64)
+        verts[:, :4, :2] = quads
+        verts[:, 4:, :2] = quads
+        verts[:, :4, 2] = 0
+        verts[:, 4:, 2] = wall_height
+        x, y, z = self._columns(verts.reshape(-1, 3))
+        i, j, k = self._columns(self._fused_box_faces(n))
+        
+        traces.append(self._trace('mesh3d',
+            x=x, y=y, z=z,
+            i=i, j=j, k=k,
+            color='#8b7355',  # Realistic wall color
+            opacity=0.9,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+    
+    def _add_3d_furniture(self, traces: List[Dict], rooms: List[Dict]):
         """Add detailed furniture elements to create realistic interiors"""
-        furniture_colors = {
-            'desk': '#8b4513',        # Saddle brown
-            'chair': '#654321',       # Dark brown
-            'bed': '#daa520',         # Goldenrod
-            'cabinet': '#a0522d',     # Sienna
-            'decoration': '#228b22'   # Forest green for plants
-        }
+        furniture_colors = self.FURNITURE_COLORS
         
         for i, room in enumerate(rooms):
             x = room.get('x', 0)
@@ -585,7 +768,7 @@ class ProfessionalFloorPlanVisualizer:
                     desk_x = x + width * 0.1
                     desk_y = y + height * 0.1
                     
-                    self._add_furniture_piece(fig, desk_x, desk_y, desk_width, desk_depth, desk_height, furniture_colors['desk'])
+                    self._add_furniture_piece(traces, desk_x, desk_y, desk_width, desk_depth, desk_height, furniture_colors['desk'])
                     
                     # Chair
                     chair_size = 0.5
@@ -593,7 +776,7 @@ class ProfessionalFloorPlanVisualizer:
                     chair_x = desk_x + desk_width + 0.2
                     chair_y = desk_y + desk_depth/2 - chair_size/2
                     
-                    self._add_furniture_piece(fig, chair_x, chair_y, chair_size, chair_size, chair_height, furniture_colors['chair'])
+                    self._add_furniture_piece(traces, chair_x, chair_y, chair_size, chair_size, chair_height, furniture_colors['chair'])
                 
                 # Bed for larger rooms
                 if size_cat in ['large', 'xlarge'] and width > 2.5:
@@ -603,7 +786,7 @@ class ProfessionalFloorPlanVisualizer:
                     bed_x = x + width - bed_width - 0.2
                     bed_y = y + height - bed_length - 0.2
                     
-                    self._add_furniture_piece(fig, bed_x, bed_y, bed_width, bed_length, bed_height, furniture_colors['bed'])
+                    self._add_furniture_piece(traces, bed_x, bed_y, bed_width, bed_length, bed_height, furniture_colors['bed'])
                 
                 # Small decoration/plant
                 if width > 2 and height > 2:
@@ -612,120 +795,63 @@ class ProfessionalFloorPlanVisualizer:
                     plant_x = x + width * 0.8
                     plant_y = y + height * 0.2
                     
-                    self._add_furniture_piece(fig, plant_x, plant_y, plant_size, plant_size, plant_height, furniture_colors['decoration'])
+                    self._add_furniture_piece(traces, plant_x, plant_y, plant_size, plant_size, plant_height, furniture_colors['decoration'])
     
-    def _add_furniture_piece(self, fig: go.Figure, x: float, y: float, width: float, depth: float, height: float, color: str):
+    def _add_furniture_piece(self, traces: List[Dict], x: float, y: float, width: float, depth: float, height: float, color: str):
         """Add a single furniture piece as a 3D box"""
-        vertices_x = [x, x+width, x+width, x, x, x+width, x+width, x]
-        vertices_y = [y, y, y+depth, y+depth, y, y, y+depth, y+depth]
-        vertices_z = [0, 0, 0, 0, height, height, height, height]
-        
-        fig.add_trace(go.Mesh3d(
-            x=vertices_x,
-            y=vertices_y,
-            z=vertices_z,
+        verts = self._UNIT_BOX_VERTS * np.float64((width, depth, height)) + np.float64((x, y, 0))
+        
+        traces.append(self._trace('mesh3d',
+            x=verts[:, 0].copy(),
+            y=verts[:, 1].copy(),
+            z=verts[:, 2].copy(),
+            i=self._BOX_FACE_COLUMNS[0],
+            j=self._BOX_FACE_COLUMNS[1],
+            k=self._BOX_FACE_COLUMNS[2],
             color=color,
             opacity=0.85,
             showlegend=False,
             hoverinfo='skip'
         ))
     
-    def _add_3d_corridors(self, fig: go.Figure, corridors: List[Dict]):
+    def _add_3d_corridors(self, traces: List[Dict], corridors: List[Dict]):
         """Add 3D corridor pathways"""
+        xs = []
+        ys = []
+        
         for corridor in corridors:
             path = corridor.get('path', [])
             if len(path) >= 2:
-                for i in range(len(path) - 1):
-                    x1, y1 = path[i][0], path[i][1]
-                    x2, y2 = path[i+1][0], path[i+1][1]
-                    
-                    # Simple corridor line at floor level
-                    fig.add_trace(go.Scatter3d(
-                        x=[x1, x2],
-                        y=[y1, y2],
-                        z=[0.1, 0.1],
-                        mode='lines',
-                        line=dict(color='#4299e1', width=8),
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
-    
-    def _add_3d_walls(self, fig: go.Figure, walls: List):
-        """Add 3D walls"""
-        for wall in walls:
-            if len(wall) >= 2:
-                for i in range(len(wall) - 1):
-                    x1, y1 = wall[i][0], wall[i][1]
-                    x2, y2 = wall[i+1][0], wall[i+1][1]
-                    
-                    # Create wall as 3D surface
-                    fig.add_trace(go.Mesh3d(
-                        x=[x1, x2, x2, x1],
-                        y=[y1, y2, y2, y1],
-                        z=[0, 0, 3, 3],
-                        color=self.colors['walls'],
-                        opacity=0.9,
-                        name='Walls',
-                        showlegend=False
-                    ))
-    
-    def _apply_professional_layout(self, fig: go.Figure, bounds: Dict):
-        """Apply professional layout and styling"""
-        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
-        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
+                x, y = self._xy(path)
+                xs += [x, self._BREAK]
+                ys += [y, self._BREAK]
         
-        # Calculate padding
-        width = max_x - min_x
-        height = max_y - min_y
-        padding = max(width, height) * 0.15
-        
-        fig.update_layout(
-            title={
-                'text': "Professional Floor Plan",
-                'x': 0.5,
-                'y': 0.95,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': self.fonts['title']
-            },
-            paper_bgcolor=self.colors['background'],
-            plot_bgcolor=self.colors['background'],
-            width=1200,
-            height=900,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.15,
-                xanchor="center",
-                x=0.5,
-                bgcolor="rgba(255,255,255,0.9)",
-                bordercolor=self.colors['grid'],
-                borderwidth=1,
-                font=self.fonts['legend']
-            ),
-            xaxis=dict(
-                range=[min_x - padding, max_x + padding],
-                showgrid=True,
-                gridcolor=self.colors['grid'],
-                gridwidth=1,
-                zeroline=False,
-                showticklabels=True,
-                title="Width (m)",
-                title_font=self.fonts['measurement'],
-                tickfont=self.fonts['measurement'],
-                scaleanchor="y",
-                scaleratio=1
-            ),
-            yaxis=dict(
-                range=[min_y - padding, max_y + padding],
-                showgrid=True,
-                gridcolor=self.colors['grid'],
-                gridwidth=1,
-                zeroline=False,
-                showticklabels=True,
-                title="Height (m)",
-                title_font=self.fonts['measurement'],
-                tickfont=self.fonts['measurement']
-            )
-        )
\ No newline at end of file
+        if xs:
+            x = np.concatenate(xs)
+            y = np.concatenate(ys)
+            
+            # All corridor lines at floor level in one trace
+            traces.append(self._trace('scatter3d',
+                x=x,
+                y=y,
+                z=np.where(np.isnan(x), np.float64(np.nan), np.float64(0.1)),
+                mode='lines',
+                connectgaps=False,
+                line=dict(color='#4299e1', width=8),
+                showlegend=False,
+                hoverinfo='skip'
+            ))
+    
+    def _build_professional_layout(self, bounds: _Bounds, shapes: List[Dict] = None,
+                                   annotations: List[Dict] = None) -> Dict:
+        """Build professional layout and styling"""
+        padding = bounds.padding
+        base = self._base_2d_layout
+        
+        return {
+            **base,
+            'shapes': shapes or [],
+            'annotations': annotations or [],
+            'xaxis': {**base['xaxis'], 'range': [bounds.min_x - padding, bounds.max_x + padding]},
+            'yaxis': {**base['yaxis'], 'range': [bounds.min_y - padding, bounds.max_y + padding]}
+        }
@@ -4,49 +4,133 @@ Extracts actual architectural elements from DXF files to create proper floor pla
 matching the user's reference images with connected room boundaries
 """
 
+import io
+import re
+import copy
+import logging
 import ezdxf
 from ezdxf import recover
 import numpy as np
+import shapely
+from shapely.strtree import STRtree
 from typing import Dict, List, Any, Optional, Tuple
+from itertools import chain, compress
+
+logger = logging.getLogger(__name__)
+
+
+# Fallback architectural structure returned when DXF processing fails.
+# Built once; _create_fallback_structure hands out deep copies, so callers may mutate them.
+_FALLBACK_BOUNDS = {'min_x': 0, 'max_x': 200, 'min_y': 0, 'max_y': 150}
+
+# Walls forming complex rooms (matching your expected output)
+_FALLBACK_WALLS = (
+    # Outer walls (main boundary)
+    {'type': 'LINE', 'points': ((0, 0), (200, 0)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((200, 0), (200, 150)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((200, 150), (0, 150)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((0, 150), (0, 0)), 'layer': 'WALLS'},
+    
+    # Complex internal room structure
+    {'type': 'LINE', 'points': ((0, 75), (120, 75)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((120, 0), (120, 150)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((60, 75), (60, 150)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((160, 75), (160, 150)), 'layer': 'WALLS'},
+    
+    # Additional room divisions
+    {'type': 'LINE', 'points': ((120, 40), (200, 40)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((120, 110), (200, 110)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((30, 40), (60, 40)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((30, 0), (30, 75)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((80, 40), (120, 40)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((80, 0), (80, 40)), 'layer': 'WALLS'},
+    
+    # More complex room structure
+    {'type': 'LINE', 'points': ((160, 40), (180, 40)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((180, 40), (180, 75)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((140, 110), (140, 130)), 'layer': 'WALLS'},
+    {'type': 'LINE', 'points': ((140, 130), (180, 130)), 'layer': 'WALLS'},
+)
+
+_FALLBACK_WALL_SEGMENTS = np.asarray([wall['points'] for wall in _FALLBACK_WALLS], dtype=np.float64)
+_FALLBACK_WALL_SEGMENTS.flags.writeable = False
+
+# Restricted areas (stairs, elevators)
+_FALLBACK_RESTRICTED_AREAS = (
+    {
+        'bounds': {
+            'min_x': 10, 'max_x': 30,
+            'min_y': 10, 'max_y': 30
+        }
+    },
+    {
+        'bounds': {
+            'min_x': 130, 'max_x': 150,
+            'min_y': 80, 'max_y': 100
+        }
+    }
+)
+
+# Entrances
+_FALLBACK_ENTRANCES = (
+    {
+        'center': (100, 0),
+        'radius': 3,
+        'bounds': {'min_x': 97, 'max_x': 103, 'min_y': -3, 'max_y': 3}
+    },
+    {
+        'center': (200, 75),
+        'radius': 2,
+        'bounds': {'min_x': 198, 'max_x': 202, 'min_y': 73, 'max_y': 77}
+    }
+)
+
 
 class ProperDXFProcessor:
     """Processes DXF files to extract proper architectural elements"""
     
+    # Below this many wall segments a linear scan beats building a spatial index
+    MIN_INDEXED_SEGMENTS = 64
+    
     def __init__(self):
         self.wall_layers = ['WALLS', 'WALL', 'MUR', 'MURS', '0', 'DEFPOINTS']
         self.door_layers = ['DOORS', 'DOOR', 'PORTE', 'PORTES']
         self.window_layers = ['WINDOWS', 'WINDOW', 'FENETRE', 'FENETRES']
         
+        # One case-insensitive alternation per category instead of a substring scan per keyword
+        self._wall_re = self._compile_layer_pattern(self.wall_layers)
+        self._door_re = self._compile_layer_pattern(self.door_layers)
+        self._window_re = self._compile_layer_pattern(self.window_layers)
+        
+        # Layer name -> (is_wall, is_door, is_window); drawings use few distinct layers
+        self._layer_cache = {}
+        
+        # Polyline type -> vertex reader, so wall extraction never branches on dxftype()
+        self._polyline_readers = {
+            'LWPOLYLINE': self._lwpolyline_points,
+            'POLYLINE': self._polyline_points
+        }
+        
+        # Wall arrays of the last result, kept beside it so the result stays JSON-serializable
+        self._wall_cache = None
+        
     def process_dxf_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Process DXF file and extract proper architectural elements"""
         try:
-            # Try to read DXF file with timeout protection
-            import io
-            import tempfile
-            import os
-            
-            # Write to temporary file for proper DXF processing
-            with tempfile.NamedTemporaryFile(suffix='.dxf', delete=False) as tmp_file:
-                tmp_file.write(file_content)
-                tmp_file_path = tmp_file.name
-            
-            try:
-                doc, auditor = recover.readfile(tmp_file_path)
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(tmp_file_path)
-                except:
-                    pass
+            # Read the DXF straight from memory, no temporary file round-trip
+            doc, auditor = recover.read(io.BytesIO(file_content))
             
             if auditor.has_errors:
-                print(f"DXF file has errors: {auditor.errors}")
+                logger.debug("DXF file has %d errors", len(auditor.errors))
             
-            # Extract architectural elements with fallback
-            walls = self._extract_walls(doc)
-            doors = self._extract_doors(doc)
-            windows = self._extract_windows(doc)
-            boundaries = self._extract_boundaries(doc)
+            # Extract architectural elements with fallback, walking modelspace once
+            entities, layer_sets = self._classify_entities(doc)
+            points_cache = {}  # id(polyline) -> decoded vertices, shared by walls and boundaries
+            walls, wall_segments = self._extract_walls(entities, layer_sets['wall'], points_cache,
+                                                     flat=self._is_flat_drawing(doc.header))
+            doors = self._extract_doors(entities, layer_sets['door'])
+            windows = self._extract_windows(entities, layer_sets['window'])
+            boundaries = self._extract_boundaries(entities, points_cache)
             
             # Calculate bounds from DXF header if available
             try:
@@ -61,19 +145,17 @@ class ProperDXFProcessor:
                         'max_y': max_pt[1]
                     }
                 else:
-                    # Calculate from entities
-                    all_points = []
-                    for wall in walls:
-                        all_points.extend(wall['points'])
+                    # Calculate from wall segments, one reduction per extreme
+                    pts = wall_segments.reshape(-1, 2)
                     
-                    if all_points:
-                        x_coords = [p[0] for p in all_points]
-                        y_coords = [p[1] for p in all_points]
+                    if len(pts):
+                        mn = pts.min(axis=0)
+                        mx = pts.max(axis=0)
                         bounds = {
-                            'min_x': min(x_coords),
-                            'max_x': max(x_coords),
-                            'min_y': min(y_coords),
-                            'max_y': max(y_coords)
+                            'min_x': float(mn[0]),
+                            'max_x': float(mx[0]),
+                            'min_y': float(mn[1]),
+                            'max_y': float(mx[1])
                         }
                     else:
                         bounds = {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100}
@@ -84,15 +166,21 @@ class ProperDXFProcessor:
             restricted_areas = []
             entrances = []
             
-            for door in doors:
+            # Entrance boxes for all doors at once: center -/+ half the door width
+            centers = np.array([door['center'] for door in doors], dtype=np.float64).reshape(-1, 2)
+            half = np.array([door.get('width', 2) for door in doors], dtype=np.float64) / 2
+            lo = (centers - half[:, None]).tolist()
+            hi = (centers + half[:, None]).tolist()
+            
+            for door, radius, (min_x, min_y), (max_x, max_y) in zip(doors, half.tolist(), lo, hi):
                 entrance = {
                     'center': door['center'],
-                    'radius': door.get('width', 2) / 2,
+                    'radius': radius,
                     'bounds': {
-                        'min_x': door['center'][0] - door.get('width', 2) / 2,
-                        'max_x': door['center'][0] + door.get('width', 2) / 2,
-                        'min_y': door['center'][1] - door.get('width', 2) / 2,
-                        'max_y': door['center'][1] + door.get('width', 2) / 2
+                        'min_x': min_x,
+                        'max_x': max_x,
+                        'min_y': min_y,
+                        'max_y': max_y
                     }
                 }
                 entrances.append(entrance)
@@ -134,273 +222,300 @@ class ProperDXFProcessor:
                 'entities': []  # For compatibility
             }
             
-            print(f"Extracted {len(walls)} walls, {len(doors)} doors, {len(windows)} windows")
+            self._wall_cache = {'result': result, 'segments': wall_segments}
+            
+            logger.debug("Extracted %d walls, %d doors, %d windows", len(walls), len(doors), len(windows))
             return result
             
         except Exception as e:
-            print(f"Error processing DXF file: {str(e)}")
+            logger.warning("Error processing DXF file %s: %s", filename, e)
             # Return fallback architectural structure
             return self._create_fallback_structure(filename)
     
-    def _extract_walls(self, doc) -> List[Dict]:
-        """Extract wall elements from DXF (floor plan only, not elevations)"""
+    def _classify_entities(self, doc) -> Tuple[Dict[str, List], Dict[str, frozenset]]:
+        """Bucket modelspace entities by DXF type in a single pass
+        
+        Also returns the wall/door/window layer names actually used in the
+        drawing, so extractors test layers with a set lookup.
+        """
+        entities = {'LINE': [], 'LWPOLYLINE': [], 'POLYLINE': [], 'INSERT': [], 'ARC': []}
+        
+        # ezdxf groups by layer for us; entities may use layers missing from the table
+        groups = doc.modelspace().groupby(dxfattrib='layer')
+        layer_names = {layer.dxf.name for layer in doc.layers}.union(groups)
+        
+        for group in groups.values():
+            for entity in group:
+                bucket = entities.get(entity.dxftype())
+                if bucket is not None:
+                    bucket.append(entity)
+        
+        layer_sets = {
+            'wall': frozenset(name for name in layer_names if self._is_wall_layer(name)),
+            'door': frozenset(name for name in layer_names if self._is_door_layer(name)),
+            'window': frozenset(name for name in layer_names if self._is_window_layer(name))
+        }
+        return entities, layer_sets
+    
+    def _extract_walls(self, entities: Dict[str, List], wall_layers: frozenset,
+                       points_cache: Optional[Dict[int, List]] = None,
+                       flat: bool = False) -> Tuple[List[Dict], np.ndarray]:
+        """Extract wall elements from DXF (floor plan only, not elevations)
+        
+        Returns the wall records and the same walls as an (N, 2, 2) segment array.
+        Decoded polyline vertices are stored in points_cache by id(entity).
+        A flat drawing (see _is_flat_drawing) skips the Z filter entirely.
+        """
+        if points_cache is None:
+            points_cache = {}
         walls = []
+        add_wall = walls.append
         
-        # Get all entities and filter for floor plan data
-        all_entities = list(doc.modelspace())
-        floor_plan_entities = self._filter_floor_plan_entities(all_entities)
+        # Segment coordinates: (x1, y1, x2, y2) per line, (n-1, 2, 2) arrays per polyline
+        line_coords = []
+        polyline_segments = []
         
-        for entity in floor_plan_entities:
-            if entity.dxftype() == 'LINE':
-                if self._is_wall_layer(entity.dxf.layer) and self._is_floor_plan_line(entity):
-                    wall = {
-                        'type': 'LINE',
-                        'points': [
-                            (entity.dxf.start.x, entity.dxf.start.y),
-                            (entity.dxf.end.x, entity.dxf.end.y)
-                        ],
-                        'layer': entity.dxf.layer
-                    }
-                    walls.append(wall)
-            
-            elif entity.dxftype() == 'LWPOLYLINE':
-                if self._is_wall_layer(entity.dxf.layer) and self._is_floor_plan_polyline(entity):
-                    points = [(point[0], point[1]) for point in entity.get_points()]
-                    if len(points) >= 2:
-                        wall = {
-                            'type': 'POLYLINE',
-                            'points': points,
-                            'layer': entity.dxf.layer
-                        }
-                        walls.append(wall)
-            
-            elif entity.dxftype() == 'POLYLINE':
-                if self._is_wall_layer(entity.dxf.layer) and self._is_floor_plan_polyline(entity):
-                    points = [(vertex.dxf.location.x, vertex.dxf.location.y) for vertex in entity.vertices]
+        # Mask line work to floor plan data; entities are skipped lazily, not copied
+        lines = entities['LINE']
+        polylines = tuple(entities[dxftype] for dxftype in self._polyline_readers)
+        if flat:
+            line_mask = [True] * len(lines)
+            polyline_mask = [True] * sum(map(len, polylines))
+        else:
+            line_mask, polyline_mask = self._floor_plan_masks(lines, polylines)
+        
+        for entity in compress(lines, line_mask):
+            dxf = entity.dxf
+            layer = dxf.layer
+            if layer in wall_layers:
+                start, end = dxf.start, dxf.end
+                add_wall({'type': 'LINE', 'points': [(start.x, start.y), (end.x, end.y)], 'layer': layer})
+                line_coords.append((start.x, start.y, end.x, end.y))
+        
+        # The polyline mask covers the buckets back to back, in reader order
+        offset = 0
+        for bucket, read_points in zip(polylines, self._polyline_readers.values()):
+            for entity in compress(bucket, polyline_mask[offset:offset + len(bucket)]):
+                layer = entity.dxf.layer
+                if layer in wall_layers:
+                    points = points_cache[id(entity)] = read_points(entity)
                     if len(points) >= 2:
-                        wall = {
-                            'type': 'POLYLINE',
-                            'points': points,
-                            'layer': entity.dxf.layer
-                        }
-                        walls.append(wall)
+                        add_wall({'type': 'POLYLINE', 'points': points.tolist(), 'layer': layer})
+                        polyline_segments.append(np.stack([points[:-1], points[1:]], axis=1))
+            offset += len(bucket)
+        
+        return walls, np.concatenate([np.asarray(line_coords, dtype=np.float64).reshape(-1, 2, 2)] + polyline_segments)
+    
+    @staticmethod
+    def _lwpolyline_points(entity) -> np.ndarray:
+        """2D vertices of an LWPOLYLINE as an (n, 2) array"""
+        return np.fromiter(chain.from_iterable(entity.get_points('xy')), dtype=np.float64).reshape(-1, 2)
+    
+    @staticmethod
+    def _polyline_points(entity) -> np.ndarray:
+        """2D vertices of a POLYLINE as an (n, 2) array"""
+        return np.fromiter(chain.from_iterable((vertex.dxf.location.x, vertex.dxf.location.y)
+                                               for vertex in entity.vertices),
+                           dtype=np.float64).reshape(-1, 2)
+    
+    def get_wall_segments(self, result: Dict[str, Any]) -> np.ndarray:
+        """Wall segments of a process_dxf_file result as an (N, 2, 2) float64 array
         
-        return walls
+        Not part of the result itself, which only holds JSON-serializable data.
+        """
+        return self._wall_entry(result)['segments']
     
-    def _filter_floor_plan_entities(self, entities) -> List:
-        """Filter entities to include only floor plan data, exclude elevations"""
-        floor_plan_entities = []
+    def get_wall_index(self, result: Dict[str, Any]) -> Optional[STRtree]:
+        """STRtree over the wall segments of result, built on first use
         
+        query() returns row indices into get_wall_segments(result). None when
+        there are too few segments for an index to pay off.
+        """
+        entry = self._wall_entry(result)
+        if 'index' not in entry:
+            entry['index'] = self._build_wall_index(entry['segments'])
+        return entry['index']
+    
+    def _wall_entry(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached wall arrays of result, rebuilt from its walls if it is not the last result"""
+        entry = self._wall_cache
+        if entry is None or entry['result'] is not result:
+            segments = [np.stack([points[:-1], points[1:]], axis=1)
+                        for points in (np.asarray(wall['points'], dtype=np.float64) for wall in result['walls'])
+                        if len(points) >= 2]
+            entry = self._wall_cache = {
+                'result': result,
+                'segments': np.concatenate(segments) if segments else np.empty((0, 2, 2))
+            }
+        return entry
+    
+    def _build_wall_index(self, segments: np.ndarray) -> Optional[STRtree]:
+        """STRtree over (N, 2, 2) wall segments"""
+        if len(segments) <= self.MIN_INDEXED_SEGMENTS:
+            return None
+        return STRtree(shapely.linestrings(segments))
+    
+    def _is_flat_drawing(self, header) -> bool:
+        """Whether header extents put the whole drawing in one plane near Z=0
+        
+        Then every entity passes the floor plan Z checks and they can be skipped.
+        """
+        try:
+            z_min = header['$EXTMIN'][2]
+            z_max = header['$EXTMAX'][2]
+        except (KeyError, IndexError, TypeError):
+            return False
+        return z_min <= z_max and z_max - z_min < 0.1 and abs(z_min) < 1.0
+    
+    def _floor_plan_masks(self, lines: List, polylines: Tuple[List, ...]) -> Tuple[List[bool], List[bool]]:
+        """Flag lines and polylines that belong to the floor plan, not elevations
+        
+        polylines is a tuple of lists, flagged in order as if concatenated.
+        """
         # Analyze Z-coordinates to identify floor plan vs elevation
-        z_coords = []
-        for entity in entities:
-            try:
-                if entity.dxftype() == 'LINE':
-                    z_coords.extend([entity.dxf.start.z, entity.dxf.end.z])
-                elif entity.dxftype() in ['LWPOLYLINE', 'POLYLINE']:
-                    # Most floor plans have Z=0
-                    z_coords.append(getattr(entity.dxf, 'elevation', 0))
-            except:
-                pass
+        line_z = np.array([(entity.dxf.start.z, entity.dxf.end.z) for entity in lines],
+                          dtype=np.float64).reshape(-1, 2)
+        polyline_z = np.fromiter((self._polyline_elevation(entity) for entity in chain(*polylines)),
+                                 dtype=np.float64, count=sum(map(len, polylines)))
+        z_coords = np.concatenate([line_z.ravel(), polyline_z])
         
         # Find the most common Z level (likely floor plan level)
-        if z_coords:
-            from collections import Counter
-            z_counter = Counter(z_coords)
-            floor_plan_z = z_counter.most_common(1)[0][0]
+        if z_coords.size:
+            levels, counts = np.unique(np.round(z_coords, 3), return_counts=True)
+            floor_plan_z = levels[counts.argmax()]
         else:
             floor_plan_z = 0
         
-        # Filter entities at floor plan level
-        for entity in entities:
-            try:
-                if entity.dxftype() == 'LINE':
-                    if abs(entity.dxf.start.z - floor_plan_z) < 0.1 and abs(entity.dxf.end.z - floor_plan_z) < 0.1:
-                        floor_plan_entities.append(entity)
-                elif entity.dxftype() in ['LWPOLYLINE', 'POLYLINE']:
-                    entity_z = getattr(entity.dxf, 'elevation', 0)
-                    if abs(entity_z - floor_plan_z) < 0.1:
-                        floor_plan_entities.append(entity)
-                else:
-                    # Include other entity types (INSERT, ARC, etc.)
-                    floor_plan_entities.append(entity)
-            except:
-                # Include entities that don't have Z coordinates
-                floor_plan_entities.append(entity)
+        # Filter entities at floor plan level; floor plan lines are also flat
+        # and floor plan polylines lie within 1 unit of Z=0
+        line_mask = (np.abs(line_z - floor_plan_z) < 0.1).all(axis=1) & (np.abs(line_z[:, 0] - line_z[:, 1]) < 0.1)
+        polyline_mask = (np.abs(polyline_z - floor_plan_z) < 0.1) & (np.abs(polyline_z) < 1.0)
         
-        return floor_plan_entities
+        return line_mask.tolist(), polyline_mask.tolist()
     
-    def _is_floor_plan_line(self, entity) -> bool:
-        """Check if line entity is part of floor plan (not elevation)"""
-        try:
-            # Floor plan lines typically have minimal Z variation
-            z_diff = abs(entity.dxf.start.z - entity.dxf.end.z)
-            return z_diff < 0.1
-        except:
-            return True
-    
-    def _is_floor_plan_polyline(self, entity) -> bool:
-        """Check if polyline entity is part of floor plan"""
-        try:
-            # Floor plan polylines are typically at elevation 0 or constant Z
-            elevation = getattr(entity.dxf, 'elevation', 0)
-            return abs(elevation) < 1.0  # Within 1 unit of Z=0
-        except:
-            return True
+    def _polyline_elevation(self, entity) -> float:
+        """Z level of a polyline; POLYLINE stores its elevation as a point"""
+        elevation = getattr(entity.dxf, 'elevation', 0)
+        if isinstance(elevation, (int, float)):
+            return elevation
+        return elevation[2]
     
-    def _extract_doors(self, doc) -> List[Dict]:
+    def _extract_doors(self, entities: Dict[str, List], door_layers: frozenset) -> List[Dict]:
         """Extract door elements from DXF"""
         doors = []
+        add_door = doors.append
         
-        for entity in doc.modelspace():
-            if entity.dxftype() == 'INSERT':
-                if self._is_door_layer(entity.dxf.layer) or 'door' in entity.dxf.name.lower():
-                    door = {
-                        'type': 'DOOR',
-                        'center': (entity.dxf.insert.x, entity.dxf.insert.y),
-                        'width': 2.0,  # Default door width
-                        'layer': entity.dxf.layer,
-                        'block_name': entity.dxf.name
-                    }
-                    doors.append(door)
-            
-            elif entity.dxftype() == 'ARC':
-                if self._is_door_layer(entity.dxf.layer):
-                    door = {
-                        'type': 'DOOR_ARC',
-                        'center': (entity.dxf.center.x, entity.dxf.center.y),
-                        'radius': entity.dxf.radius,
-                        'width': entity.dxf.radius * 2,
-                        'layer': entity.dxf.layer
-                    }
-                    doors.append(door)
+        for entity in entities['INSERT']:
+            dxf = entity.dxf
+            layer, name = dxf.layer, dxf.name
+            if layer in door_layers or 'door' in name.lower():
+                insert = dxf.insert
+                add_door({
+                    'type': 'DOOR',
+                    'center': (insert.x, insert.y),
+                    'width': 2.0,  # Default door width
+                    'layer': layer,
+                    'block_name': name
+                })
+        
+        for entity in entities['ARC']:
+            dxf = entity.dxf
+            layer = dxf.layer
+            if layer in door_layers:
+                center, radius = dxf.center, dxf.radius
+                add_door({
+                    'type': 'DOOR_ARC',
+                    'center': (center.x, center.y),
+                    'radius': radius,
+                    'width': radius * 2,
+                    'layer': layer
+                })
         
         return doors
     
-    def _extract_windows(self, doc) -> List[Dict]:
+    def _extract_windows(self, entities: Dict[str, List], window_layers: frozenset) -> List[Dict]:
         """Extract window elements from DXF"""
         windows = []
+        add_window = windows.append
         
-        for entity in doc.modelspace():
-            if entity.dxftype() == 'INSERT':
-                if self._is_window_layer(entity.dxf.layer) or 'window' in entity.dxf.name.lower():
-                    window = {
-                        'type': 'WINDOW',
-                        'center': (entity.dxf.insert.x, entity.dxf.insert.y),
-                        'width': 1.5,  # Default window width
-                        'layer': entity.dxf.layer,
-                        'block_name': entity.dxf.name
-                    }
-                    windows.append(window)
+        for entity in entities['INSERT']:
+            dxf = entity.dxf
+            layer, name = dxf.layer, dxf.name
+            if layer in window_layers or 'window' in name.lower():
+                insert = dxf.insert
+                add_window({
+                    'type': 'WINDOW',
+                    'center': (insert.x, insert.y),
+                    'width': 1.5,  # Default window width
+                    'layer': layer,
+                    'block_name': name
+                })
         
         return windows
     
-    def _extract_boundaries(self, doc) -> List[Dict]:
-        """Extract building boundaries from DXF"""
+    def _extract_boundaries(self, entities: Dict[str, List],
+                            points_cache: Optional[Dict[int, List]] = None) -> List[Dict]:
+        """Extract building boundaries from DXF, reusing vertices decoded for walls"""
         boundaries = []
+        points_cache = points_cache or {}
         
-        for entity in doc.modelspace():
-            if entity.dxftype() == 'LWPOLYLINE':
-                if entity.closed:
-                    points = [(point[0], point[1]) for point in entity.get_points()]
-                    if len(points) >= 4:  # At least a rectangle
-                        boundary = {
-                            'type': 'BOUNDARY',
-                            'points': points,
-                            'layer': entity.dxf.layer
-                        }
-                        boundaries.append(boundary)
+        for entity in entities['LWPOLYLINE']:
+            if entity.closed:
+                points = points_cache.get(id(entity))
+                if points is None:
+                    points = self._lwpolyline_points(entity)
+                if len(points) >= 4:  # At least a rectangle
+                    boundary = {
+                        'type': 'BOUNDARY',
+                        'points': points.tolist(),
+                        'layer': entity.dxf.layer
+                    }
+                    boundaries.append(boundary)
         
         return boundaries
     
+    @staticmethod
+    def _compile_layer_pattern(keywords: List[str]) -> re.Pattern:
+        """Compile layer keywords into one case-insensitive regex"""
+        return re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE)
+    
+    def _layer_roles(self, layer_name: str) -> Tuple[bool, bool, bool]:
+        """Wall/door/window classification of a layer, matched once per layer name"""
+        roles = self._layer_cache.get(layer_name)
+        if roles is None:
+            roles = (
+                self._wall_re.search(layer_name) is not None,
+                self._door_re.search(layer_name) is not None,
+                self._window_re.search(layer_name) is not None
+            )
+            self._layer_cache[layer_name] = roles
+        return roles
+    
     def _is_wall_layer(self, layer_name: str) -> bool:
         """Check if layer contains walls"""
-        layer_upper = layer_name.upper()
-        return any(wall_layer in layer_upper for wall_layer in self.wall_layers)
+        return self._layer_roles(layer_name)[0]
     
     def _is_door_layer(self, layer_name: str) -> bool:
         """Check if layer contains doors"""
-        layer_upper = layer_name.upper()
-        return any(door_layer in layer_upper for door_layer in self.door_layers)
+        return self._layer_roles(layer_name)[1]
     
     def _is_window_layer(self, layer_name: str) -> bool:
         """Check if layer contains windows"""
-        layer_upper = layer_name.upper()
-        return any(window_layer in layer_upper for window_layer in self.window_layers)
+        return self._layer_roles(layer_name)[2]
     
     def _create_fallback_structure(self, filename: str) -> Dict[str, Any]:
         """Create fallback architectural structure when DXF processing fails"""
-        # Create realistic architectural structure
-        bounds = {'min_x': 0, 'max_x': 200, 'min_y': 0, 'max_y': 150}
-        
-        # Create walls forming complex rooms (matching your expected output)
-        walls = [
-            # Outer walls (main boundary)
-            {'type': 'LINE', 'points': [(0, 0), (200, 0)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(200, 0), (200, 150)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(200, 150), (0, 150)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(0, 150), (0, 0)], 'layer': 'WALLS'},
-            
-            # Complex internal room structure
-            {'type': 'LINE', 'points': [(0, 75), (120, 75)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(120, 0), (120, 150)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(60, 75), (60, 150)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(160, 75), (160, 150)], 'layer': 'WALLS'},
-            
-            # Additional room divisions
-            {'type': 'LINE', 'points': [(120, 40), (200, 40)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(120, 110), (200, 110)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(30, 40), (60, 40)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(30, 0), (30, 75)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(80, 40), (120, 40)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(80, 0), (80, 40)], 'layer': 'WALLS'},
-            
-            # More complex room structure
-            {'type': 'LINE', 'points': [(160, 40), (180, 40)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(180, 40), (180, 75)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(140, 110), (140, 130)], 'layer': 'WALLS'},
-            {'type': 'LINE', 'points': [(140, 130), (180, 130)], 'layer': 'WALLS'},
-        ]
-        
-        # Create restricted areas (stairs, elevators)
-        restricted_areas = [
-            {
-                'bounds': {
-                    'min_x': 10, 'max_x': 30,
-                    'min_y': 10, 'max_y': 30
-                }
-            },
-            {
-                'bounds': {
-                    'min_x': 130, 'max_x': 150,
-                    'min_y': 80, 'max_y': 100
-                }
-            }
-        ]
-        
-        # Create entrances
-        entrances = [
-            {
-                'center': (100, 0),
-                'radius': 3,
-                'bounds': {'min_x': 97, 'max_x': 103, 'min_y': -3, 'max_y': 3}
-            },
-            {
-                'center': (200, 75),
-                'radius': 2,
-                'bounds': {'min_x': 198, 'max_x': 202, 'min_y': 73, 'max_y': 77}
-            }
-        ]
-        
-        return {
+        result = {
             'success': True,
-            'walls': walls,
+            'walls': copy.deepcopy(list(_FALLBACK_WALLS)),
             'doors': [],
             'windows': [],
             'boundaries': [],
-            'restricted_areas': restricted_areas,
-            'entrances': entrances,
-            'bounds': bounds,
-            'entity_count': len(walls),
+            'restricted_areas': copy.deepcopy(list(_FALLBACK_RESTRICTED_AREAS)),
+            'entrances': copy.deepcopy(list(_FALLBACK_ENTRANCES)),
+            'bounds': dict(_FALLBACK_BOUNDS),
+            'entity_count': len(_FALLBACK_WALLS),
             'entities': []
-        }
\ No newline at end of file
+        }
+        self._wall_cache = {'result': result, 'segments': _FALLBACK_WALL_SEGMENTS}
+        return result
@@ -4,82 +4,77 @@ Extracts actual architectural data from DXF files without simplification
 Uses optimized parsing for speed while maintaining full detail
 """
 
+import io
+import re
 import ezdxf
 from ezdxf import recover
+from ezdxf.query import EntityQuery
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class RealDXFProcessor:
     """Processes real DXF data with optimized parsing for speed"""
     
+    # Only these modelspace entity types are ever read
+    ENTITY_TYPES = ('LINE', 'LWPOLYLINE', 'POLYLINE', 'INSERT', 'ARC')
+    
     def __init__(self):
         self.wall_layers = ['WALLS', 'WALL', 'MUR', 'MURS', '0', 'DEFPOINTS', 'LAYER']
         self.door_layers = ['DOORS', 'DOOR', 'PORTE', 'PORTES']
         self.window_layers = ['WINDOWS', 'WINDOW', 'FENETRE', 'FENETRES']
         
+        self._wall_re = self._compile_layer_pattern(self.wall_layers)
+        self._door_re = self._compile_layer_pattern(self.door_layers)
+        
+        # Layer/block name -> match result; drawings use few distinct names
+        self._wall_names = {}
+        self._door_names = {}
+        
+        # dxftype -> handler(entity, on_wall_layer, on_door_layer, found)
+        self._entity_handlers = {
+            'LINE': self._collect_line,
+            'LWPOLYLINE': self._collect_lwpolyline,
+            'POLYLINE': self._collect_polyline,
+            'INSERT': self._collect_door,
+            'ARC': self._collect_door
+        }
+        
     def process_dxf_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Process DXF file extracting real architectural data"""
         try:
-            import io
-            import tempfile
-            import os
+            print(f"Processing real DXF file: {filename}")
+            start_time = time.time()
             
-            # Write to temporary file for proper DXF processing
-            with tempfile.NamedTemporaryFile(suffix='.dxf', delete=False) as tmp_file:
-                tmp_file.write(file_content)
-                tmp_file_path = tmp_file.name
+            # Load the modelspace entities we need straight from memory
+            entities, header = self._load_entities(file_content)
             
-            try:
-                print(f"Processing real DXF file: {filename}")
-                start_time = time.time()
-                
-                # Load DXF document
-                doc, auditor = recover.readfile(tmp_file_path)
-                
-                # Get real bounds from header
-                bounds = self._get_real_bounds(doc)
-                
-                # Extract all architectural elements in parallel
-                with ThreadPoolExecutor(max_workers=3) as executor:
-                    # Submit parallel tasks
-                    walls_future = executor.submit(self._extract_all_walls, doc)
-                    doors_future = executor.submit(self._extract_all_doors, doc)
-                    areas_future = executor.submit(self._extract_restricted_areas, doc, bounds)
-                    
-                    # Get results
-                    walls = walls_future.result()
-                    doors = doors_future.result()
-                    restricted_areas = areas_future.result()
-                
-                # Create entrances from doors
-                entrances = self._create_entrances_from_doors(doors)
-                
-                processing_time = time.time() - start_time
-                print(f"Real DXF processing completed in {processing_time:.2f}s")
-                print(f"Extracted: {len(walls)} walls, {len(doors)} doors, {len(restricted_areas)} restricted areas")
-                
-                return {
-                    'success': True,
-                    'walls': walls,
-                    'doors': doors,
-                    'windows': [],
-                    'boundaries': [],
-                    'restricted_areas': restricted_areas,
-                    'entrances': entrances,
-                    'bounds': bounds,
-                    'entity_count': len(walls) + len(doors),
-                    'entities': [],
-                    'processing_time': processing_time
-                }
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(tmp_file_path)
-                except:
-                    pass
+            # Get real bounds from header
+            bounds = self._get_real_bounds(header)
+            
+            # Extract all architectural elements in one pass over the entities
+            walls, doors, restricted_areas = self._extract_elements(entities, bounds)
+            
+            # Create entrances from doors
+            entrances = self._create_entrances_from_doors(doors)
+            
+            processing_time = time.time() - start_time
+            print(f"Real DXF processing completed in {processing_time:.2f}s")
+            print(f"Extracted: {len(walls)} walls, {len(doors)} doors, {len(restricted_areas)} restricted areas")
+            
+            return {
+                'success': True,
+                'walls': walls,
+                'doors': doors,
+                'windows': [],
+                'boundaries': [],
+                'restricted_areas': restricted_areas,
+                'entrances': entrances,
+                'bounds': bounds,
+                'entity_count': len(walls) + len(doors),
+                'entities': [],
+                'processing_time': processing_time
+            }
                     
         except Exception as e:
             print(f"Error processing real DXF file: {str(e)}")
@@ -94,10 +89,18 @@ class RealDXFProcessor:
                 'entities': []
             }
     
-    def _get_real_bounds(self, doc) -> Dict[str, float]:
-        """Get real bounds from DXF header"""
+    def _load_entities(self, file_content: bytes) -> Tuple[EntityQuery, Any]:
+        """Load the modelspace entities of interest and the header variables
+        
+        The recovering parser reads the DXF bytes from memory, without a
+        temporary file; $EXTMIN/$EXTMAX are read from doc.header.
+        """
+        doc, auditor = recover.read(io.BytesIO(file_content))
+        return doc.modelspace().query(' '.join(self.ENTITY_TYPES)), doc.header
+    
+    def _get_real_bounds(self, header) -> Dict[str, float]:
+        """Get real bounds from DXF header variables"""
         try:
-            header = doc.header
             if '$EXTMIN' in header and '$EXTMAX' in header:
                 min_pt = header['$EXTMIN']
                 max_pt = header['$EXTMAX']
@@ -112,195 +115,182 @@ class RealDXFProcessor:
         
         return {'min_x': 0, 'max_x': 200, 'min_y': 0, 'max_y': 150}
     
-    def _extract_all_walls(self, doc) -> List[Dict]:
-        """Extract all wall entities efficiently"""
-        walls = []
+    def _extract_elements(self, entities: EntityQuery,
+                          bounds: Dict[str, float]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """Sort entities into walls, doors and restricted areas in a single pass"""
+        found = {'wall_lines': [], 'polyline_walls': [], 'doors': [], 'closed_polylines': []}
+        handlers = self._entity_handlers
         
         try:
-            # Process entities in chunks for better performance
-            entities = list(doc.modelspace())
-            chunk_size = 1000
-            
-            for i in range(0, len(entities), chunk_size):
-                chunk = entities[i:i + chunk_size]
+            # Classify each distinct layer once instead of checking every entity's layer
+            for layer, layer_entities in entities.groupby(dxfattrib='layer').items():
+                on_wall_layer = self._name_matches(self._wall_re, self._wall_names, layer)
+                on_door_layer = self._name_matches(self._door_re, self._door_names, layer)
                 
-                for entity in chunk:
-                    try:
-                        if entity.dxftype() == 'LINE':
-                            if self._is_wall_entity(entity):
-                                wall = {
-                                    'type': 'LINE',
-                                    'points': [
-                                        (float(entity.dxf.start.x), float(entity.dxf.start.y)),
-                                        (float(entity.dxf.end.x), float(entity.dxf.end.y))
-                                    ],
-                                    'layer': entity.dxf.layer
-                                }
-                                walls.append(wall)
-                        
-                        elif entity.dxftype() == 'LWPOLYLINE':
-                            if self._is_wall_entity(entity):
-                                points = [(float(point[0]), float(point[1])) for point in entity.get_points()]
-                                if len(points) >= 2:
-                                    wall = {
-                                        'type': 'POLYLINE',
-                                        'points': points,
-                                        'layer': entity.dxf.layer
-                                    }
-                                    walls.append(wall)
-                        
-                        elif entity.dxftype() == 'POLYLINE':
-                            if self._is_wall_entity(entity):
-                                points = [(float(vertex.dxf.location.x), float(vertex.dxf.location.y)) 
-                                         for vertex in entity.vertices]
-                                if len(points) >= 2:
-                                    wall = {
-                                        'type': 'POLYLINE',
-                                        'points': points,
-                                        'layer': entity.dxf.layer
-                                    }
-                                    walls.append(wall)
-                                    
-                    except Exception as e:
-                        # Skip problematic entities but continue processing
-                        continue
+                for entity in layer_entities:
+                    handler = handlers.get(entity.dxftype())
+                    if handler is not None:
+                        handler(entity, on_wall_layer, on_door_layer, found)
                         
         except Exception as e:
-            print(f"Error extracting walls: {str(e)}")
+            print(f"Error extracting elements: {str(e)}")
         
-        return walls
-    
-    def _extract_all_doors(self, doc) -> List[Dict]:
-        """Extract all door entities"""
-        doors = []
+        polyline_walls = found['polyline_walls']
+        doors = found['doors']
+        walls = self._line_walls(found['wall_lines']) + polyline_walls
+        restricted_areas = self._restricted_areas(found['closed_polylines'])
         
+        # If no restricted areas found, create some based on layout
+        if not restricted_areas:
+            restricted_areas = self._inferred_restricted_areas(bounds)
+        
+        return walls, doors, restricted_areas
+    
+    def _collect_line(self, entity, on_wall_layer: bool, on_door_layer: bool, found: Dict[str, List]):
+        if on_wall_layer:
+            found['wall_lines'].append(entity)
+    
+    def _collect_lwpolyline(self, entity, on_wall_layer: bool, on_door_layer: bool, found: Dict[str, List]):
+        self._collect_polyline(entity, on_wall_layer, on_door_layer, found)
+        # Closed LWPOLYLINEs on any layer are restricted area candidates
+        if entity.closed:
+            found['closed_polylines'].append(entity)
+    
+    def _collect_polyline(self, entity, on_wall_layer: bool, on_door_layer: bool, found: Dict[str, List]):
+        if on_wall_layer:
+            wall = self._polyline_wall(entity)
+            if wall:
+                found['polyline_walls'].append(wall)
+    
+    def _collect_door(self, entity, on_wall_layer: bool, on_door_layer: bool, found: Dict[str, List]):
+        if on_door_layer or self._is_door_entity(entity):
+            door = self._door(entity)
+            if door:
+                found['doors'].append(door)
+    
+    def _line_walls(self, lines: List) -> List[Dict]:
+        """Build wall dicts for LINE entities on wall layers"""
         try:
-            for entity in doc.modelspace():
-                try:
-                    if entity.dxftype() == 'INSERT':
-                        if self._is_door_entity(entity):
-                            door = {
-                                'type': 'DOOR',
-                                'center': (float(entity.dxf.insert.x), float(entity.dxf.insert.y)),
-                                'width': 2.0,
-                                'layer': entity.dxf.layer,
-                                'block_name': entity.dxf.name
-                            }
-                            doors.append(door)
-                    
-                    elif entity.dxftype() == 'ARC':
-                        if self._is_door_entity(entity):
-                            door = {
-                                'type': 'DOOR_ARC',
-                                'center': (float(entity.dxf.center.x), float(entity.dxf.center.y)),
-                                'radius': float(entity.dxf.radius),
-                                'width': float(entity.dxf.radius) * 2,
-                                'layer': entity.dxf.layer
-                            }
-                            doors.append(door)
-                            
-                except Exception as e:
-                    continue
-                    
+            # Read all endpoints into one array, convert back to lists in one call
+            coords = np.asarray([(dxf.start.x, dxf.start.y, dxf.end.x, dxf.end.y)
+                                 for dxf in (entity.dxf for entity in lines)],
+                                dtype=np.float64).reshape(-1, 2, 2)
+            
+            return [{
+                'type': 'LINE',
+                'points': points,
+                'layer': entity.dxf.layer
+            } for entity, points in zip(lines, coords.tolist())]
+            
         except Exception as e:
-            print(f"Error extracting doors: {str(e)}")
-        
-        return doors
+            print(f"Error extracting walls: {str(e)}")
+            return []
     
-    def _extract_restricted_areas(self, doc, bounds: Dict[str, float]) -> List[Dict]:
-        """Extract restricted areas from DXF or create based on layout"""
-        restricted_areas = []
-        
+    def _polyline_wall(self, entity) -> Optional[Dict]:
+        """Build a wall dict for an LWPOLYLINE/POLYLINE on a wall layer"""
         try:
-            # Look for rectangles or closed polylines that could be restricted areas
-            for entity in doc.modelspace():
-                try:
-                    if entity.dxftype() == 'LWPOLYLINE' and entity.closed:
-                        points = [(float(point[0]), float(point[1])) for point in entity.get_points()]
-                        if len(points) >= 4:  # At least a rectangle
-                            # Calculate bounding box
-                            x_coords = [p[0] for p in points]
-                            y_coords = [p[1] for p in points]
-                            
-                            area_bounds = {
-                                'min_x': min(x_coords),
-                                'max_x': max(x_coords),
-                                'min_y': min(y_coords),
-                                'max_y': max(y_coords)
-                            }
-                            
-                            # Check if it's a reasonable size for restricted area
-                            width = area_bounds['max_x'] - area_bounds['min_x']
-                            height = area_bounds['max_y'] - area_bounds['min_y']
-                            
-                            if 5 <= width <= 50 and 5 <= height <= 50:  # Reasonable size
-                                restricted_areas.append({
-                                    'bounds': area_bounds,
-                                    'type': 'EXTRACTED',
-                                    'layer': entity.dxf.layer
-                                })
-                                
-                except Exception as e:
-                    continue
-        
+            if entity.dxftype() == 'LWPOLYLINE':
+                points = list(entity.get_points('xy'))
+            else:
+                # points() yields each vertex location as an already numeric Vec3
+                points = [(x, y) for x, y, _ in entity.points()]
+            if len(points) >= 2:
+                return {
+                    'type': 'POLYLINE',
+                    'points': points,
+                    'layer': entity.dxf.layer
+                }
         except Exception as e:
-            print(f"Error extracting restricted areas: {str(e)}")
-        
-        # If no restricted areas found, create some based on layout
-        if not restricted_areas:
-            width = bounds['max_x'] - bounds['min_x']
-            height = bounds['max_y'] - bounds['min_y']
-            
-            # Create 2-3 strategic restricted areas
-            restricted_areas = [
-                {
-                    'bounds': {
-                        'min_x': bounds['min_x'] + width * 0.1,
-                        'max_x': bounds['min_x'] + width * 0.25,
-                        'min_y': bounds['min_y'] + height * 0.1,
-                        'max_y': bounds['min_y'] + height * 0.25
-                    },
-                    'type': 'INFERRED'
-                },
-                {
-                    'bounds': {
-                        'min_x': bounds['min_x'] + width * 0.75,
-                        'max_x': bounds['min_x'] + width * 0.9,
-                        'min_y': bounds['min_y'] + height * 0.75,
-                        'max_y': bounds['min_y'] + height * 0.9
-                    },
-                    'type': 'INFERRED'
+            # Skip problematic entities but continue processing
+            pass
+        return None
+    
+    def _door(self, entity) -> Optional[Dict]:
+        """Build a door dict for an INSERT/ARC on a door layer or door block"""
+        try:
+            if entity.dxftype() == 'INSERT':
+                return {
+                    'type': 'DOOR',
+                    'center': (float(entity.dxf.insert.x), float(entity.dxf.insert.y)),
+                    'width': 2.0,
+                    'layer': entity.dxf.layer,
+                    'block_name': entity.dxf.name
                 }
-            ]
+            
+            return {
+                'type': 'DOOR_ARC',
+                'center': (float(entity.dxf.center.x), float(entity.dxf.center.y)),
+                'radius': float(entity.dxf.radius),
+                'width': float(entity.dxf.radius) * 2,
+                'layer': entity.dxf.layer
+            }
+        except Exception as e:
+            return None
+    
+    def _restricted_areas(self, polylines: List) -> List[Dict]:
+        """Restricted areas from closed LWPOLYLINEs with a rectangle-sized bounding box"""
+        candidates = []
+        point_arrays = []
+        for entity in polylines:
+            try:
+                points = np.asarray(entity.get_points('xy'), dtype=np.float64)
+            except Exception as e:
+                continue
+            if len(points) >= 4:  # At least a rectangle
+                candidates.append(entity)
+                point_arrays.append(points)
+        
+        if not candidates:
+            return []
         
-        return restricted_areas
+        # Bounding boxes of all candidates in one reduction over the concatenated vertices
+        starts = np.cumsum([0] + [len(points) for points in point_arrays[:-1]])
+        vertices = np.concatenate(point_arrays)
+        mins = np.minimum.reduceat(vertices, starts, axis=0)
+        maxs = np.maximum.reduceat(vertices, starts, axis=0)
+        
+        # Check if it's a reasonable size for restricted area
+        size = maxs - mins
+        reasonable = np.all((size >= 5) & (size <= 50), axis=1)
+        
+        return [{
+            'bounds': {'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y},
+            'type': 'EXTRACTED',
+            'layer': entity.dxf.layer
+        } for entity, (min_x, min_y), (max_x, max_y), keep
+            in zip(candidates, mins.tolist(), maxs.tolist(), reasonable.tolist()) if keep]
     
-    def _create_entrances_from_doors(self, doors: List[Dict]) -> List[Dict]:
-        """Create entrances from door data"""
-        entrances = []
+    def _inferred_restricted_areas(self, bounds: Dict[str, float]) -> List[Dict]:
+        """Create 2 strategic restricted areas when the drawing has none"""
+        width = bounds['max_x'] - bounds['min_x']
+        height = bounds['max_y'] - bounds['min_y']
         
-        for door in doors:
-            center = door.get('center', (0, 0))
-            width = door.get('width', 2.0)
-            radius = door.get('radius', width / 2)
-            
-            entrance = {
-                'center': center,
-                'radius': radius,
+        return [
+            {
                 'bounds': {
-                    'min_x': center[0] - radius,
-                    'max_x': center[0] + radius,
-                    'min_y': center[1] - radius,
-                    'max_y': center[1] + radius
+                    'min_x': bounds['min_x'] + width * 0.1,
+                    'max_x': bounds['min_x'] + width * 0.25,
+                    'min_y': bounds['min_y'] + height * 0.1,
+                    'max_y': bounds['min_y'] + height * 0.25
                 },
-                'type': 'FROM_DOOR',
-                'door_type': door.get('type', 'DOOR')
+                'type': 'INFERRED'
+            },
+            {
+                'bounds': {
+                    'min_x': bounds['min_x'] + width * 0.75,
+                    'max_x': bounds['min_x'] + width * 0.9,
+                    'min_y': bounds['min_y'] + height * 0.75,
+                    'max_y': bounds['min_y'] + height * 0.9
+                },
+                'type': 'INFERRED'
             }
-            entrances.append(entrance)
-        
+        ]
+    
+    def _create_entrances_from_doors(self, doors: List[Dict]) -> List[Dict]:
+        """Create entrances from door data"""
         # If no doors found, create default entrances
-        if not entrances:
-            entrances = [
+        if not doors:
+            return [
                 {
                     'center': (100, 0),
                     'radius': 3,
@@ -309,28 +299,42 @@ class RealDXFProcessor:
                 }
             ]
         
-        return entrances
+        # Entrance bounds for all doors in one broadcast
+        centers = [door.get('center', (0, 0)) for door in doors]
+        radii = np.asarray([door.get('radius', door.get('width', 2.0) / 2) for door in doors],
+                           dtype=np.float64)
+        offsets = radii[:, None]
+        center_xy = np.asarray(centers, dtype=np.float64)
+        mins = (center_xy - offsets).tolist()
+        maxs = (center_xy + offsets).tolist()
+        
+        return [{
+            'center': center,
+            'radius': radius,
+            'bounds': {'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y},
+            'type': 'FROM_DOOR',
+            'door_type': door.get('type', 'DOOR')
+        } for door, center, radius, (min_x, min_y), (max_x, max_y)
+            in zip(doors, centers, radii.tolist(), mins, maxs)]
     
-    def _is_wall_entity(self, entity) -> bool:
-        """Check if entity is a wall based on layer and properties"""
-        try:
-            layer_name = entity.dxf.layer.upper()
-            return any(wall_layer in layer_name for wall_layer in self.wall_layers)
-        except:
-            return False
+    @staticmethod
+    def _compile_layer_pattern(keywords: List[str]) -> re.Pattern:
+        """Compile layer keywords into one case-insensitive regex"""
+        return re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE)
+    
+    @staticmethod
+    def _name_matches(pattern: re.Pattern, cache: Dict[str, bool], name: str) -> bool:
+        """Match a layer or block name, searching each distinct name only once"""
+        match = cache.get(name)
+        if match is None:
+            match = cache[name] = pattern.search(name) is not None
+        return match
     
     def _is_door_entity(self, entity) -> bool:
         """Check if entity is a door based on layer and properties"""
-        try:
-            layer_name = entity.dxf.layer.upper()
-            is_door_layer = any(door_layer in layer_name for door_layer in self.door_layers)
-            
-            # Also check block name for INSERT entities
-            if entity.dxftype() == 'INSERT':
-                block_name = entity.dxf.name.upper()
-                is_door_block = any(door_layer in block_name for door_layer in self.door_layers)
-                return is_door_layer or is_door_block
-            
-            return is_door_layer
-        except:
-            return False
\ No newline at end of file
+        if self._name_matches(self._door_re, self._door_names, entity.dxf.get('layer', '')):
+            return True
+        
+        # Also check block name for INSERT entities
+        return (entity.dxftype() == 'INSERT'
+                and self._name_matches(self._door_re, self._door_names, entity.dxf.get('name', '')))
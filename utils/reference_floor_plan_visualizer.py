@@ -5,12 +5,45 @@ Clean, simple floor plan with gray walls, blue restricted areas, red entrances
 """
 
 import plotly.graph_objects as go
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
+from PIL import Image, ImageDraw
+from plan_cache import LastPlanCache
+
+# Unit circle outline used to draw entrances as polygons
+_CIRCLE_ANGLES = np.linspace(0, 2 * np.pi, 33)
+_CIRCLE_X = np.cos(_CIRCLE_ANGLES)
+_CIRCLE_Y = np.sin(_CIRCLE_ANGLES)
+
+
+def _rectangle_outlines(items: List[Dict]):
+    """NaN-separated closed outlines of the items' bounds rectangles"""
+    rects = np.asarray([(b['min_x'], b['min_y'], b['max_x'], b['max_y'])
+                        for b in (item.get('bounds', {}) for item in items) if b],
+                       dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = rects.T
+    gap = np.full(len(rects), np.nan)
+    xs = np.column_stack([x0, x1, x1, x0, x0, gap]).ravel()
+    ys = np.column_stack([y0, y0, y1, y1, y0, gap]).ravel()
+    return xs, ys
+
+
+def _circle_outlines(centers: np.ndarray, radii: np.ndarray):
+    """NaN-separated closed polygon outlines of circles"""
+    gap = np.full((len(centers), 1), np.nan)
+    xs = np.hstack([centers[:, :1] + radii[:, None] * _CIRCLE_X, gap]).ravel()
+    ys = np.hstack([centers[:, 1:] + radii[:, None] * _CIRCLE_Y, gap]).ravel()
+    return xs, ys
+
 
 class ReferenceFloorPlanVisualizer:
     """Creates visualization exactly matching user's reference images"""
     
+    # Above this many wall vertices the walls are sent as one PNG instead of a line trace
+    RASTER_WALL_POINTS = 200_000
+    # Raster width in pixels (2x the figure width, so walls stay sharp on HiDPI screens)
+    RASTER_WIDTH = 2400
+    
     def __init__(self):
         self.wall_color = "#6B7280"  # Gray walls
         self.restricted_color = "#3B82F6"  # Blue restricted areas
@@ -19,8 +52,23 @@ class ReferenceFloorPlanVisualizer:
         self.corridor_color = "#F59E0B"  # Orange corridors
         self.background_color = "#F3F4F6"  # Light gray background
         
+        # Empty plan of the last analysis; the three create_* views of one
+        # analysis all start from this figure
+        self._empty_cache = LastPlanCache()
+        # Axis layout of the last bounds seen: tuple(bounds.items()) -> update_layout kwargs
+        self._axis_cache = {}
+        
     def create_empty_floor_plan(self, analysis_data: Dict) -> go.Figure:
         """Create empty floor plan matching reference image 1"""
+        # The plan draws walls, restricted areas and entrances, so a change in
+        # any of their counts rebuilds it
+        counts = (len(analysis_data.get('walls', [])),
+                  len(analysis_data.get('restricted_areas', [])),
+                  len(analysis_data.get('entrances', [])))
+        return self._empty_cache.get(analysis_data, counts, self._build_empty_floor_plan)
+    
+    def _build_empty_floor_plan(self, analysis_data: Dict) -> go.Figure:
+        """Build the walls/restricted areas/entrances figure"""
         fig = go.Figure()
         
         # Set background
@@ -29,15 +77,28 @@ class ReferenceFloorPlanVisualizer:
             paper_bgcolor="white",
             title="Floor Plan Visualization",
             title_x=0.5,
-            showlegend=False,
+            showlegend=True,
+            legend=dict(
+                title=dict(text="<b>LÉGENDE</b>", font=dict(size=14, color="black")),
+                x=0.95, y=0.95,
+                xanchor="right", yanchor="top",
+                font=dict(size=11, color="black"),
+                bgcolor="white",
+                bordercolor="black",
+                borderwidth=1
+            ),
             width=1200,
             height=800
         )
         
+        # Set proper axis ranges
+        bounds = analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100})
+        x_range, y_range = self._set_clean_axis_ranges(fig, bounds)
+        
         # Add walls as gray lines
         walls = analysis_data.get('walls', [])
         if walls:
-            self._add_walls_clean(fig, walls)
+            self._add_walls_clean(fig, walls, x_range, y_range)
         
         # Add restricted areas as blue rectangles
         restricted_areas = analysis_data.get('restricted_areas', [])
@@ -49,13 +110,6 @@ class ReferenceFloorPlanVisualizer:
         if entrances:
             self._add_entrances_clean(fig, entrances)
         
-        # Set proper axis ranges
-        bounds = analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100})
-        self._set_clean_axis_ranges(fig, bounds)
-        
-        # Add clean legend
-        self._add_clean_legend(fig)
-        
         return fig
     
     def create_floor_plan_with_ilots(self, analysis_data: Dict, ilots: List[Dict]) -> go.Figure:
@@ -66,9 +120,6 @@ class ReferenceFloorPlanVisualizer:
         if ilots:
             self._add_ilots_clean(fig, ilots)
         
-        # Update legend to include îlots
-        self._add_legend_with_ilots(fig)
-        
         return fig
     
     def create_complete_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict]) -> go.Figure:
@@ -79,241 +130,186 @@ class ReferenceFloorPlanVisualizer:
         if corridors:
             self._add_corridors_clean(fig, corridors)
         
-        # Update legend to include corridors
-        self._add_legend_with_corridors(fig)
-        
         return fig
     
-    def _add_walls_clean(self, fig: go.Figure, walls: List[Dict]):
-        """Add walls as clean gray lines"""
-        x_coords = []
-        y_coords = []
+    def _add_walls_clean(self, fig: go.Figure, walls: List[Dict],
+                         x_range: Optional[List[float]] = None, y_range: Optional[List[float]] = None):
+        """Add walls as clean gray lines
         
-        for wall in walls:
-            points = wall.get('points', [])
-            if len(points) >= 2:
-                for i in range(len(points) - 1):
-                    x_coords.extend([points[i][0], points[i+1][0], None])
-                    y_coords.extend([points[i][1], points[i+1][1], None])
+        Very large plans are drawn as a background image covering x_range/y_range.
+        """
+        x_coords, y_coords = self._wall_coordinates(walls)
         
-        if x_coords:
+        if (len(x_coords) > self.RASTER_WALL_POINTS and x_range is not None
+                and x_range[1] > x_range[0] and y_range[1] > y_range[0]):
+            self._add_walls_image(fig, x_coords, y_coords, x_range, y_range)
+        elif len(x_coords):
             fig.add_trace(go.Scatter(
                 x=x_coords,
                 y=y_coords,
                 mode='lines',
                 line=dict(color=self.wall_color, width=2),
-                name='Walls',
+                name='MUR',
+                legendrank=3,
+                hoverinfo='skip'
+            ))
+    
+    def _add_walls_image(self, fig: go.Figure, x_coords, y_coords,
+                         x_range: List[float], y_range: List[float]):
+        """Rasterize the walls once and place the image under the traces"""
+        width = self.RASTER_WIDTH
+        height = max(1, round(width * (y_range[1] - y_range[0]) / (x_range[1] - x_range[0])))
+        affine = self._world_to_pixel(x_range, y_range, width, height)
+        
+        # One matrix product maps every wall vertex to image pixels
+        world = np.column_stack([np.asarray(x_coords, dtype=np.float64),
+                                 np.asarray(y_coords, dtype=np.float64),
+                                 np.ones(len(x_coords))])
+        pixels = (world @ affine.T)[:, :2]
+        
+        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        breaks = np.flatnonzero(np.isnan(pixels[:, 0]))
+        for line in np.split(pixels, breaks):
+            line = line[~np.isnan(line[:, 0])]
+            if len(line) >= 2:
+                draw.line(line.ravel().tolist(), fill=self.wall_color, width=4)
+        
+        fig.add_layout_image(
+            source=image,
+            xref='x', yref='y',
+            x=x_range[0], y=y_range[1],
+            sizex=x_range[1] - x_range[0], sizey=y_range[1] - y_range[0],
+            sizing='stretch',
+            layer='below'
+        )
+        
+        # Legend entry for the rasterized walls
+        fig.add_trace(go.Scatter(
+            x=[None], y=[None],
+            mode='lines',
+            line=dict(color=self.wall_color, width=2),
+            name='MUR',
+            legendrank=3,
+            hoverinfo='skip'
+        ))
+    
+    def _world_to_pixel(self, x_range: List[float], y_range: List[float],
+                        width: int, height: int) -> np.ndarray:
+        """Affine (3x3) mapping world coordinates in the axis ranges to image pixels"""
+        sx = width / (x_range[1] - x_range[0])
+        sy = height / (y_range[1] - y_range[0])
+        # Image rows grow downwards, so y is flipped about the top of the range
+        return np.array([
+            [sx, 0.0, -sx * x_range[0]],
+            [0.0, -sy, sy * y_range[1]],
+            [0.0, 0.0, 1.0]
+        ])
+    
+    def _wall_coordinates(self, walls: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """NaN-separated wall segment coordinates (start, end, NaN per segment)"""
+        polylines = [np.asarray(points, dtype=np.float64)[:, :2]
+                     for points in (wall.get('points', []) for wall in walls) if len(points) >= 2]
+        if not polylines:
+            return np.empty(0), np.empty(0)
+        
+        # Ragged layout: all vertices in one array; every vertex except the
+        # last one of each wall starts a segment
+        vertices = np.concatenate(polylines)
+        is_start = np.ones(len(vertices), dtype=bool)
+        is_start[np.cumsum([len(points) for points in polylines]) - 1] = False
+        starts = np.flatnonzero(is_start)
+        
+        segments = np.full((len(starts), 3, 2), np.nan)
+        segments[:, 0] = vertices[starts]
+        segments[:, 1] = vertices[starts + 1]
+        flat = segments.reshape(-1, 2)
+        return flat[:, 0], flat[:, 1]
+    
+    def _add_polygons(self, fig: go.Figure, xs: np.ndarray, ys: np.ndarray,
+                      color: str, opacity: float, line_width: int, name: str, legendrank: int):
+        """Add NaN-separated polygons as one filled trace with its own legend entry"""
+        if len(xs):
+            fig.add_trace(go.Scatter(
+                x=xs,
+                y=ys,
+                mode='lines',
+                fill='toself',
+                fillcolor=color,
+                opacity=opacity,
+                line=dict(color=color, width=line_width),
+                name=name,
+                legendrank=legendrank,
                 hoverinfo='skip'
             ))
     
     def _add_restricted_areas_clean(self, fig: go.Figure, restricted_areas: List[Dict]):
         """Add restricted areas as clean blue rectangles"""
-        for area in restricted_areas:
-            bounds = area.get('bounds', {})
-            if bounds:
-                fig.add_shape(
-                    type="rect",
-                    x0=bounds['min_x'], y0=bounds['min_y'],
-                    x1=bounds['max_x'], y1=bounds['max_y'],
-                    fillcolor=self.restricted_color,
-                    opacity=0.7,
-                    line=dict(color=self.restricted_color, width=1)
-                )
+        xs, ys = _rectangle_outlines(restricted_areas)
+        self._add_polygons(fig, xs, ys, self.restricted_color, 0.7, 1, 'NO ENTRÉE', 1)
     
     def _add_entrances_clean(self, fig: go.Figure, entrances: List[Dict]):
         """Add entrances as clean red circles"""
-        for entrance in entrances:
-            center = entrance.get('center', (0, 0))
-            radius = entrance.get('radius', 2)
-            
-            fig.add_shape(
-                type="circle",
-                x0=center[0] - radius, y0=center[1] - radius,
-                x1=center[0] + radius, y1=center[1] + radius,
-                fillcolor=self.entrance_color,
-                opacity=0.8,
-                line=dict(color=self.entrance_color, width=2)
-            )
+        centers = np.asarray([entrance.get('center', (0, 0)) for entrance in entrances],
+                             dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray([entrance.get('radius', 2) for entrance in entrances], dtype=np.float64)
+        xs, ys = _circle_outlines(centers, radii)
+        self._add_polygons(fig, xs, ys, self.entrance_color, 0.8, 2, 'ENTRÉE/SORTIE', 2)
     
     def _add_ilots_clean(self, fig: go.Figure, ilots: List[Dict]):
         """Add îlots as clean green rectangles"""
-        for ilot in ilots:
-            bounds = ilot.get('bounds', {})
-            if bounds:
-                fig.add_shape(
-                    type="rect",
-                    x0=bounds['min_x'], y0=bounds['min_y'],
-                    x1=bounds['max_x'], y1=bounds['max_y'],
-                    fillcolor=self.ilot_color,
-                    opacity=0.8,
-                    line=dict(color=self.ilot_color, width=1)
-                )
+        xs, ys = _rectangle_outlines(ilots)
+        self._add_polygons(fig, xs, ys, self.ilot_color, 0.8, 1, 'ÎLOTS', 4)
     
     def _add_corridors_clean(self, fig: go.Figure, corridors: List[Dict]):
-        """Add corridors as clean orange lines"""
+        """Add corridors as clean orange lines, all in one NaN-separated trace"""
+        separator = np.full((1, 2), np.nan)
+        parts = []
         for corridor in corridors:
             points = corridor.get('path', [])
             if len(points) >= 2:
-                x_coords = [p[0] for p in points]
-                y_coords = [p[1] for p in points]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines',
-                    line=dict(color=self.corridor_color, width=3),
-                    name='Corridor',
-                    hoverinfo='skip'
-                ))
-    
-    def _set_clean_axis_ranges(self, fig: go.Figure, bounds: Dict):
-        """Set clean axis ranges with proper padding"""
-        padding_x = (bounds['max_x'] - bounds['min_x']) * 0.1
-        padding_y = (bounds['max_y'] - bounds['min_y']) * 0.1
+                parts.append(np.asarray(points, dtype=np.float64)[:, :2])
+                parts.append(separator)
         
-        fig.update_xaxes(
-            range=[bounds['min_x'] - padding_x, bounds['max_x'] + padding_x],
-            showgrid=False,
-            showticklabels=False,
-            zeroline=False
-        )
-        fig.update_yaxes(
-            range=[bounds['min_y'] - padding_y, bounds['max_y'] + padding_y],
-            showgrid=False,
-            showticklabels=False,
-            zeroline=False,
-            scaleanchor="x",
-            scaleratio=1
-        )
-    
-    def _add_clean_legend(self, fig: go.Figure):
-        """Add clean legend matching reference image"""
-        fig.add_annotation(
-            x=0.95, y=0.95,
-            text="<b>LÉGENDE</b>",
-            showarrow=False,
-            xref="paper", yref="paper",
-            xanchor="right", yanchor="top",
-            font=dict(size=14, color="black"),
-            bgcolor="white",
-            bordercolor="black",
-            borderwidth=1
-        )
-        
-        legend_items = [
-            {"color": self.restricted_color, "text": "NO ENTRÉE", "y": 0.88},
-            {"color": self.entrance_color, "text": "ENTRÉE/SORTIE", "y": 0.84},
-            {"color": self.wall_color, "text": "MUR", "y": 0.80}
-        ]
-        
-        for item in legend_items:
-            # Color square
-            fig.add_shape(
-                type="rect",
-                x0=0.82, y0=item["y"] - 0.01,
-                x1=0.85, y1=item["y"] + 0.01,
-                fillcolor=item["color"],
-                line=dict(color=item["color"], width=1),
-                xref="paper", yref="paper"
-            )
-            
-            # Text
-            fig.add_annotation(
-                x=0.87, y=item["y"],
-                text=item["text"],
-                showarrow=False,
-                xref="paper", yref="paper",
-                xanchor="left", yanchor="middle",
-                font=dict(size=11, color="black")
-            )
+        if parts:
+            xy = np.concatenate(parts)
+            fig.add_trace(go.Scatter(
+                x=xy[:, 0],
+                y=xy[:, 1],
+                mode='lines',
+                line=dict(color=self.corridor_color, width=3),
+                name='CORRIDORS',
+                legendrank=5,
+                hoverinfo='skip'
+            ))
     
-    def _add_legend_with_ilots(self, fig: go.Figure):
-        """Add legend including îlots"""
-        fig.layout.annotations = []
-        fig.layout.shapes = [s for s in fig.layout.shapes if not (s.get('x0', 0) > 0.8 and s.get('fillcolor') == 'white')]
-        
-        fig.add_annotation(
-            x=0.95, y=0.95,
-            text="<b>LÉGENDE</b>",
-            showarrow=False,
-            xref="paper", yref="paper",
-            xanchor="right", yanchor="top",
-            font=dict(size=14, color="black"),
-            bgcolor="white",
-            bordercolor="black",
-            borderwidth=1
-        )
-        
-        legend_items = [
-            {"color": self.restricted_color, "text": "NO ENTRÉE", "y": 0.88},
-            {"color": self.entrance_color, "text": "ENTRÉE/SORTIE", "y": 0.84},
-            {"color": self.wall_color, "text": "MUR", "y": 0.80},
-            {"color": self.ilot_color, "text": "ÎLOTS", "y": 0.76}
-        ]
-        
-        for item in legend_items:
-            # Color square
-            fig.add_shape(
-                type="rect",
-                x0=0.82, y0=item["y"] - 0.01,
-                x1=0.85, y1=item["y"] + 0.01,
-                fillcolor=item["color"],
-                line=dict(color=item["color"], width=1),
-                xref="paper", yref="paper"
-            )
-            
-            # Text
-            fig.add_annotation(
-                x=0.87, y=item["y"],
-                text=item["text"],
-                showarrow=False,
-                xref="paper", yref="paper",
-                xanchor="left", yanchor="middle",
-                font=dict(size=11, color="black")
+    def _set_clean_axis_ranges(self, fig: go.Figure, bounds: Dict) -> Tuple[List[float], List[float]]:
+        """Set clean axis ranges with proper padding; returns the x and y ranges"""
+        key = tuple(bounds.items())
+        axes = self._axis_cache.get(key)
+        if axes is None:
+            padding_x = (bounds['max_x'] - bounds['min_x']) * 0.1
+            padding_y = (bounds['max_y'] - bounds['min_y']) * 0.1
+            axes = dict(
+                xaxis=dict(
+                    range=[bounds['min_x'] - padding_x, bounds['max_x'] + padding_x],
+                    showgrid=False,
+                    showticklabels=False,
+                    zeroline=False
+                ),
+                yaxis=dict(
+                    range=[bounds['min_y'] - padding_y, bounds['max_y'] + padding_y],
+                    showgrid=False,
+                    showticklabels=False,
+                    zeroline=False,
+                    scaleanchor="x",
+                    scaleratio=1
+                )
             )
-    
-    def _add_legend_with_corridors(self, fig: go.Figure):
-        """Add legend including corridors"""
-        fig.layout.annotations = []
-        fig.layout.shapes = [s for s in fig.layout.shapes if not (s.get('x0', 0) > 0.8 and s.get('fillcolor') == 'white')]
+            # Keep the user's pan/zoom across re-renders of the same plan
+            axes['uirevision'] = str(key)
+            self._axis_cache = {key: axes}
         
-        fig.add_annotation(
-            x=0.95, y=0.95,
-            text="<b>LÉGENDE</b>",
-            showarrow=False,
-            xref="paper", yref="paper",
-            xanchor="right", yanchor="top",
-            font=dict(size=14, color="black"),
-            bgcolor="white",
-            bordercolor="black",
-            borderwidth=1
-        )
-        
-        legend_items = [
-            {"color": self.restricted_color, "text": "NO ENTRÉE", "y": 0.88},
-            {"color": self.entrance_color, "text": "ENTRÉE/SORTIE", "y": 0.84},
-            {"color": self.wall_color, "text": "MUR", "y": 0.80},
-            {"color": self.ilot_color, "text": "ÎLOTS", "y": 0.76},
-            {"color": self.corridor_color, "text": "CORRIDORS", "y": 0.72}
-        ]
+        fig.update_layout(**axes)
         
-        for item in legend_items:
-            # Color square
-            fig.add_shape(
-                type="rect",
-                x0=0.82, y0=item["y"] - 0.01,
-                x1=0.85, y1=item["y"] + 0.01,
-                fillcolor=item["color"],
-                line=dict(color=item["color"], width=1),
-                xref="paper", yref="paper"
-            )
-            
-            # Text
-            fig.add_annotation(
-                x=0.87, y=item["y"],
-                text=item["text"],
-                showarrow=False,
-                xref="paper", yref="paper",
-                xanchor="left", yanchor="middle",
-                font=dict(size=11, color="black")
-            )
\ No newline at end of file
+        return axes['xaxis']['range'], axes['yaxis']['range']
@@ -6,14 +6,23 @@ Creates visualizations matching the exact style from your reference images:
 - Image 3: Same layout with red corridor lines connecting îlots
 """
 
+import logging
 import plotly.graph_objects as go
 import plotly.express as px
 from typing import Dict, List, Any, Optional
 import numpy as np
+import shapely
+from plan_cache import LastPlanCache
+
+logger = logging.getLogger(__name__)
 
 class ReferenceStyleVisualizer:
     """Creates visualizations exactly matching your reference images"""
     
+    # Walls are simplified to within 1/WALL_SIMPLIFY_PIXELS of the plan's larger
+    # side, well under a screen pixel at the figure's size
+    WALL_SIMPLIFY_PIXELS = 4000
+    
     def __init__(self):
         # Colors matching your reference images
         self.colors = {
@@ -26,47 +35,52 @@ class ReferenceStyleVisualizer:
             'text': '#ff6b6b',           # Red text for measurements
             'grid': '#f0f0f0'            # Light grid
         }
+        # Empty plan of the last analysis; îlot and corridor views of one
+        # analysis are drawn on a copy of this figure
+        self._empty_cache = LastPlanCache()
     
     def create_empty_floor_plan(self, analysis_data: Dict) -> go.Figure:
         """Create empty floor plan like your Image 1 - ONLY REAL DATA"""
-        fig = go.Figure()
+        # Walls fall back to raw entities when an analysis has none, so the
+        # entity count is part of the key next to the drawn element counts
+        counts = (len(analysis_data.get('walls', [])),
+                  len(analysis_data.get('entities', [])),
+                  len(analysis_data.get('restricted_areas', [])),
+                  len(analysis_data.get('entrances', [])))
+        return self._empty_cache.get(analysis_data, counts, self._build_empty_floor_plan)
+    
+    def _build_empty_floor_plan(self, analysis_data: Dict) -> go.Figure:
+        """Build the walls/restricted areas/entrances figure in one Figure construction"""
+        traces = []
         
         bounds = analysis_data.get('bounds', {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100})
         
-        # Add white background
-        self._add_background(fig, bounds)
-        
         # Add black walls - ONLY if real data exists
         walls = analysis_data.get('walls', [])
         entities = analysis_data.get('entities', [])
         
-        print(f"DEBUG: Found {len(walls)} walls and {len(entities)} entities")
+        logger.debug("Found %d walls and %d entities", len(walls), len(entities))
         
         if walls:
-            self._add_walls(fig, walls)
+            traces += self._wall_traces(walls, bounds)
         elif entities:
             # Try to extract walls from entities - ONLY real data
-            self._add_walls_from_entities(fig, entities, bounds)
+            traces += self._entity_wall_traces(entities)
         else:
-            print("DEBUG: No wall data found in analysis_data")
+            logger.debug("No wall data found in analysis_data")
         
         # Add blue restricted areas (NO ENTREE) - ONLY if real data exists
         restricted_areas = analysis_data.get('restricted_areas', [])
         if restricted_areas:
-            self._add_restricted_areas(fig, restricted_areas)
+            traces += self._restricted_area_traces(restricted_areas)
         
         # Add red entrance areas (ENTREE/SORTIE) - ONLY if real data exists
         entrances = analysis_data.get('entrances', [])
         if entrances:
-            self._add_entrance_areas(fig, entrances)
-        
-        # Add legend like in your image
-        self._add_legend(fig)
+            traces += self._entrance_traces(entrances)
         
-        # Set layout to match your reference
-        self._set_clean_layout(fig, bounds)
-        
-        return fig
+        # Layout matching your reference; traces and layout are validated once, together
+        return go.Figure(data=traces, layout=self._clean_layout(bounds))
     
     def create_floor_plan_with_ilots(self, analysis_data: Dict, ilots: List[Dict]) -> go.Figure:
         """Create floor plan with red îlots like your Image 2"""
@@ -74,164 +88,153 @@ class ReferenceStyleVisualizer:
         fig = self.create_empty_floor_plan(analysis_data)
         
         # Add red rectangular îlots
-        self._add_red_ilots(fig, ilots)
+        self._add_layout_items(fig, shapes=self._red_ilot_shapes(self._ilot_columns(ilots)))
         
         return fig
     
     def create_complete_floor_plan(self, analysis_data: Dict, ilots: List[Dict], corridors: List[Dict]) -> go.Figure:
         """Create floor plan with îlots and red corridors like your Image 3"""
-        # Start with îlots
-        fig = self.create_floor_plan_with_ilots(analysis_data, ilots)
+        # Start with empty floor plan
+        fig = self.create_empty_floor_plan(analysis_data)
         
         # Add red corridor lines
-        self._add_red_corridors(fig, corridors)
+        fig.add_traces(self._red_corridor_traces(corridors))
         
-        # Add area measurements in red text
-        self._add_area_measurements(fig, ilots)
+        # Add red îlots and their area measurements in red text in one layout update
+        columns = self._ilot_columns(ilots)
+        self._add_layout_items(fig, shapes=self._red_ilot_shapes(columns),
+                               annotations=self._area_measurement_annotations(columns))
         
         return fig
     
-    def _add_background(self, fig: go.Figure, bounds: Dict):
-        """Add white background - no mock outlines"""
-        min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
-        min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
-        
-        # Add white background only
-        fig.add_shape(
-            type="rect",
-            x0=min_x - 5, y0=min_y - 5,
-            x1=max_x + 5, y1=max_y + 5,
-            fillcolor=self.colors['background'],
-            line=dict(color=self.colors['background'], width=0)
-        )
-    
-    def _add_walls(self, fig: go.Figure, walls: List):
-        """Add black walls exactly like your reference"""
-        print(f"DEBUG: Adding {len(walls)} walls")
-        walls_added = 0
-        
-        # Group all wall coordinates to create connected floor plan
-        all_x_coords = []
-        all_y_coords = []
+    def _wall_traces(self, walls: List, bounds: Dict) -> List:
+        """Black walls exactly like your reference"""
+        logger.debug("Adding %d walls", len(walls))
         
+        # Each wall as an (n, 2) float array; walls that are not point lists are skipped
+        polylines = []
         for wall in walls:
             if len(wall) >= 2:
-                x_coords = [point[0] for point in wall]
-                y_coords = [point[1] for point in wall]
-                
-                # Add individual wall segments
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines',
-                    line=dict(
-                        color=self.colors['walls'],
-                        width=3
-                    ),
-                    showlegend=False,
-                    hoverinfo='skip',
-                    name='wall'
-                ))
-                walls_added += 1
-                
-                # Collect all coordinates for bounds calculation
-                all_x_coords.extend(x_coords)
-                all_y_coords.extend(y_coords)
+                try:
+                    polylines.append(np.asarray(wall, dtype=np.float64)[:, :2])
+                except (ValueError, TypeError, IndexError) as e:
+                    logger.debug("Skipping wall that is not a point list: %s", e)
+        walls_added = len(polylines)
+        
+        traces = []
+        if polylines:
+            # Douglas-Peucker drops the vertices that make no visible difference
+            tolerance = max(bounds.get('max_x', 100) - bounds.get('min_x', 0),
+                            bounds.get('max_y', 100) - bounds.get('min_y', 0)) / self.WALL_SIMPLIFY_PIXELS
+            lines = shapely.linestrings(np.concatenate(polylines),
+                                        indices=np.repeat(np.arange(walls_added), [len(p) for p in polylines]))
+            points, index = shapely.get_coordinates(
+                shapely.simplify(lines, tolerance, preserve_topology=False), return_index=True)
+            
+            # All walls in a single trace; NaN breaks the line between walls
+            ends = np.cumsum(np.bincount(index, minlength=walls_added))
+            coords = np.insert(points, ends, np.nan, axis=0)
+            traces = self._line_traces(coords[:, 0], coords[:, 1],
+                                       dict(color=self.colors['walls'], width=3), **self._legend_entry('MUR', 3))
         
-        print(f"DEBUG: Successfully added {walls_added} wall traces to figure")
+        logger.debug("Successfully added %d walls to figure", walls_added)
         
-        # Print coordinate ranges for debugging
-        if all_x_coords and all_y_coords:
-            try:
-                min_x = float(min(all_x_coords))
-                max_x = float(max(all_x_coords))
-                min_y = float(min(all_y_coords))
-                max_y = float(max(all_y_coords))
-                print(f"DEBUG: X range: [{min_x:.1f}, {max_x:.1f}]")
-                print(f"DEBUG: Y range: [{min_y:.1f}, {max_y:.1f}]")
-            except (ValueError, TypeError) as e:
-                print(f"DEBUG: Error formatting coordinates: {e}")
-                print(f"DEBUG: X coords sample: {all_x_coords[:5]}")
-                print(f"DEBUG: Y coords sample: {all_y_coords[:5]}")
+        # Log coordinate ranges for debugging
+        if polylines and logger.isEnabledFor(logging.DEBUG) and len(points):
+            min_x, min_y = points.min(axis=0)
+            max_x, max_y = points.max(axis=0)
+            logger.debug("X range: [%.1f, %.1f]", min_x, max_x)
+            logger.debug("Y range: [%.1f, %.1f]", min_y, max_y)
+        
+        return traces
+    
+    def _line_traces(self, x_coords: List, y_coords: List, line: Dict,
+                     webgl: bool = True, **kwargs) -> List:
+        """None-separated polylines as one trace (none if empty), rendered with WebGL by default"""
+        trace_type = go.Scattergl if webgl else go.Scatter
+        kwargs.setdefault('showlegend', False)
+        if not len(x_coords):
+            return []
+        return [trace_type(
+            x=x_coords,
+            y=y_coords,
+            mode='lines',
+            line=line,
+            hoverinfo='skip',
+            **kwargs
+        )]
+    
+    @staticmethod
+    def _legend_entry(name: str, rank: int) -> Dict:
+        """Trace kwargs that list the trace itself in the legend, in reference order"""
+        return dict(name=name, showlegend=True, legendrank=rank)
     
-    def _add_restricted_areas(self, fig: go.Figure, restricted_areas: List):
-        """Add blue restricted areas (NO ENTREE)"""
+    def _restricted_area_traces(self, restricted_areas: List) -> List:
+        """Blue restricted areas (NO ENTREE)"""
+        x_coords = []
+        y_coords = []
         for area in restricted_areas:
             if len(area) >= 3:
-                x_coords = [point[0] for point in area] + [area[0][0]]
-                y_coords = [point[1] for point in area] + [area[0][1]]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    fill='toself',
-                    fillcolor=self.colors['restricted'],
-                    line=dict(color=self.colors['restricted'], width=2),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
+                x_coords.extend([point[0] for point in area] + [area[0][0], None])
+                y_coords.extend([point[1] for point in area] + [area[0][1], None])
+        
+        # Each None-separated polygon is filled on its own; SVG Scatter is kept
+        # here because gap-separated 'toself' fills are only reliable in SVG
+        return self._line_traces(x_coords, y_coords,
+                                 dict(color=self.colors['restricted'], width=2), webgl=False,
+                                 fill='toself', fillcolor=self.colors['restricted'],
+                                 **self._legend_entry('NO ENTRÉE', 1))
     
-    def _add_entrance_areas(self, fig: go.Figure, entrances: List):
-        """Add red entrance areas (ENTREE/SORTIE)"""
+    def _entrance_traces(self, entrances: List) -> List:
+        """Red entrance areas (ENTREE/SORTIE)"""
+        x_coords = []
+        y_coords = []
         for entrance in entrances:
             if len(entrance) >= 2:
-                x_coords = [point[0] for point in entrance]
-                y_coords = [point[1] for point in entrance]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines',
-                    line=dict(
-                        color=self.colors['entrances'],
-                        width=6
-                    ),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
+                x_coords.extend([point[0] for point in entrance] + [None])
+                y_coords.extend([point[1] for point in entrance] + [None])
+        
+        return self._line_traces(x_coords, y_coords,
+                                 dict(color=self.colors['entrances'], width=6),
+                                 **self._legend_entry('ENTRÉE/SORTIE', 2))
     
-    def _add_red_ilots(self, fig: go.Figure, ilots: List[Dict]):
-        """Add red rectangular îlots like your Image 2"""
-        for ilot in ilots:
-            x = ilot.get('x', 0)
-            y = ilot.get('y', 0)
-            width = ilot.get('width', 2)
-            height = ilot.get('height', 2)
-            
-            # Create red rectangle
-            fig.add_shape(
-                type="rect",
-                x0=x, y0=y,
-                x1=x + width, y1=y + height,
-                fillcolor=self.colors['ilots'],
-                line=dict(color=self.colors['ilots'], width=2),
-                opacity=0.7
-            )
+    @staticmethod
+    def _ilot_columns(ilots: List[Dict]) -> np.ndarray:
+        """Read the îlot dicts once into x, y, width, height and area rows"""
+        columns = np.array([(ilot.get('x', 0), ilot.get('y', 0), ilot.get('width', 2), ilot.get('height', 2),
+                             ilot.get('area', np.nan)) for ilot in ilots], dtype=np.float64).reshape(-1, 5).T
+        # Îlots without an area are measured from their rectangle
+        missing = np.isnan(columns[4])
+        columns[4, missing] = columns[2, missing] * columns[3, missing]
+        return columns
     
-    def _add_red_corridors(self, fig: go.Figure, corridors: List[Dict]):
-        """Add red corridor lines like your Image 3"""
+    def _red_ilot_shapes(self, columns: np.ndarray) -> List[Dict]:
+        """Red rectangular îlot shapes like your Image 2"""
+        x, y, width, height, _ = columns
+        line = dict(color=self.colors['ilots'], width=2)
+        return [dict(type="rect", x0=x0, y0=y0, x1=x1, y1=y1,
+                     fillcolor=self.colors['ilots'], line=line, opacity=0.7)
+                for x0, y0, x1, y1 in zip(x.tolist(), y.tolist(), (x + width).tolist(), (y + height).tolist())]
+    
+    def _red_corridor_traces(self, corridors: List[Dict]) -> List:
+        """Red corridor lines like your Image 3"""
+        x_coords = []
+        y_coords = []
         for corridor in corridors:
             path = corridor.get('path', [])
             if len(path) >= 2:
-                x_coords = [point[0] for point in path]
-                y_coords = [point[1] for point in path]
-                
-                fig.add_trace(go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='lines',
-                    line=dict(
-                        color=self.colors['corridors'],
-                        width=4,
-                        dash='solid'
-                    ),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
+                x_coords.extend([point[0] for point in path] + [None])
+                y_coords.extend([point[1] for point in path] + [None])
+        
+        return self._line_traces(x_coords, y_coords,
+                                 dict(color=self.colors['corridors'], width=4, dash='solid'))
     
-    def _add_walls_from_entities(self, fig: go.Figure, entities: List, bounds: Dict):
+    def _entity_wall_traces(self, entities: List) -> List:
         """Create walls from DXF entities"""
-        print(f"DEBUG: Processing {len(entities)} entities for walls")
+        logger.debug("Processing %d entities for walls", len(entities))
+        
+        x_coords = []
+        y_coords = []
         
         # Extract LINE entities as walls
         for entity in entities:
@@ -239,110 +242,55 @@ class ReferenceStyleVisualizer:
                 start = entity.get('start', [0, 0])
                 end = entity.get('end', [100, 100])
                 
-                print(f"DEBUG: Adding wall from {start} to {end}")
+                logger.debug("Adding wall from %s to %s", start, end)
                 
-                fig.add_trace(go.Scatter(
-                    x=[start[0], end[0]],
-                    y=[start[1], end[1]],
-                    mode='lines',
-                    line=dict(color=self.colors['walls'], width=3),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
-            elif entity.get('type') == 'POLYLINE':
-                # Handle polylines as walls
+                x_coords.extend([start[0], end[0], None])
+                y_coords.extend([start[1], end[1], None])
+            elif entity.get('type') in ('POLYLINE', 'LWPOLYLINE'):
+                # Handle polylines and lightweight polylines as walls
                 points = entity.get('points', [])
                 if len(points) >= 2:
-                    x_coords = [p[0] for p in points]
-                    y_coords = [p[1] for p in points]
-                    
-                    fig.add_trace(go.Scatter(
-                        x=x_coords,
-                        y=y_coords,
-                        mode='lines',
-                        line=dict(color=self.colors['walls'], width=3),
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
-            elif entity.get('type') == 'LWPOLYLINE':
-                # Handle lightweight polylines
-                points = entity.get('points', [])
-                if len(points) >= 2:
-                    x_coords = [p[0] for p in points]
-                    y_coords = [p[1] for p in points]
-                    
-                    fig.add_trace(go.Scatter(
-                        x=x_coords,
-                        y=y_coords,
-                        mode='lines',
-                        line=dict(color=self.colors['walls'], width=3),
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
+                    x_coords.extend([p[0] for p in points] + [None])
+                    y_coords.extend([p[1] for p in points] + [None])
+        
+        return self._line_traces(x_coords, y_coords, dict(color=self.colors['walls'], width=3),
+                                 **self._legend_entry('MUR', 3))
     
-    def _add_area_measurements(self, fig: go.Figure, ilots: List[Dict]):
-        """Add red area measurements like your Image 3"""
-        for ilot in ilots:
-            x = ilot.get('x', 0)
-            y = ilot.get('y', 0)
-            width = ilot.get('width', 2)
-            height = ilot.get('height', 2)
-            area = ilot.get('area', width * height)
-            
-            # Add area text in red
-            fig.add_annotation(
-                x=x + width/2,
-                y=y + height/2,
-                text=f"{area:.1f}m²",
-                font=dict(color=self.colors['text'], size=10),
-                showarrow=False,
-                bgcolor='white',
-                bordercolor=self.colors['text'],
-                borderwidth=1
-            )
+    def _area_measurement_annotations(self, columns: np.ndarray) -> List[Dict]:
+        """Red area measurement labels like your Image 3"""
+        x, y, width, height, area = columns
+        font = dict(color=self.colors['text'], size=10)
+        return [dict(x=center_x, y=center_y, text=f"{ilot_area:.1f}m²", font=font, showarrow=False,
+                     bgcolor='white', bordercolor=self.colors['text'], borderwidth=1)
+                for center_x, center_y, ilot_area in zip((x + width / 2).tolist(), (y + height / 2).tolist(),
+                                                         area.tolist())]
     
-    def _add_legend(self, fig: go.Figure):
-        """Add legend like your reference image"""
-        # Add legend entries as invisible traces
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None],
-            mode='markers',
-            marker=dict(size=10, color=self.colors['restricted']),
-            name='NO ENTRÉE',
-            showlegend=True
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None],
-            mode='markers',
-            marker=dict(size=10, color=self.colors['entrances']),
-            name='ENTRÉE/SORTIE',
-            showlegend=True
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None],
-            mode='markers',
-            marker=dict(size=10, color=self.colors['walls']),
-            name='MUR',
-            showlegend=True
-        ))
+    def _add_layout_items(self, fig: go.Figure, shapes: List[Dict] = (), annotations: List[Dict] = ()):
+        """Append shapes and annotations with one update_layout instead of an add_* call per item"""
+        update = {}
+        if shapes:
+            update['shapes'] = list(fig.layout.shapes or []) + list(shapes)
+        if annotations:
+            update['annotations'] = list(fig.layout.annotations or []) + list(annotations)
+        if update:
+            fig.update_layout(**update)
     
-    def _set_clean_layout(self, fig: go.Figure, bounds: Dict):
-        """Set clean layout matching your reference"""
+    def _clean_layout(self, bounds: Dict) -> Dict:
+        """Clean layout matching your reference"""
         min_x, max_x = bounds.get('min_x', 0), bounds.get('max_x', 100)
         min_y, max_y = bounds.get('min_y', 0), bounds.get('max_y', 100)
         
-        print(f"DEBUG: Setting layout with bounds: x=[{min_x:.1f}, {max_x:.1f}], y=[{min_y:.1f}, {max_y:.1f}]")
+        logger.debug("Setting layout with bounds: x=[%.1f, %.1f], y=[%.1f, %.1f]",
+                     min_x, max_x, min_y, max_y)
         
         # Calculate proper padding
         width = max_x - min_x if max_x > min_x else 1000
         height = max_y - min_y if max_y > min_y else 1000
         padding = max(width * 0.05, height * 0.05, 100)  # Minimum 100 unit padding
         
-        print(f"DEBUG: Using padding: {padding:.1f}")
+        logger.debug("Using padding: %.1f", padding)
         
-        fig.update_layout(
+        return dict(
             title="Floor Plan Analysis",
             title_font_size=20,
             title_x=0.5,
@@ -362,8 +310,9 @@ class ReferenceStyleVisualizer:
                 scaleratio=1,
                 visible=True
             ),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
+            # The white background comes from the layout, not a shape
+            plot_bgcolor=self.colors['background'],
+            paper_bgcolor=self.colors['background'],
             showlegend=True,
             legend=dict(
                 orientation="h",
@@ -4,12 +4,16 @@ Guaranteed to place îlots successfully with real data processing
 """
 
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional, Mapping
 
 class SimpleIlotPlacer:
     """Simple, reliable îlot placer that always succeeds"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # Jitter source for the placement grid; pass a seed for repeatable layouts
+        self.rng = np.random.default_rng(seed)
         self.size_categories = {
             'small': {'width': 2.0, 'height': 1.5, 'area': 3.0},
             'medium': {'width': 3.0, 'height': 2.0, 'area': 6.0},
@@ -50,59 +54,51 @@ class SimpleIlotPlacer:
         size_distribution = self._get_size_distribution(target_count)
         
         # Create placement grid
-        grid_points = self._create_placement_grid(bounds, target_count)
+        grid_xs, grid_ys = self._create_placement_grid(min_x, min_y, width, height)
+        
+        # Expand the distribution into one size category per îlot, as far as the grid reaches
+        size_cats = list(size_distribution)
+        counts = list(size_distribution.values())
+        count = min(sum(counts), len(grid_xs))
+        categories = np.repeat(size_cats, counts)[:count].tolist()
+        colors = np.repeat([self.color_map[c] for c in size_cats], counts)[:count].tolist()
+        widths = np.repeat([self.size_categories[c]['width'] for c in size_cats], counts)[:count] * 0.8  # Slightly smaller for safety
+        heights = np.repeat([self.size_categories[c]['height'] for c in size_cats], counts)[:count] * 0.8
+        
+        # Ensure îlots fit within bounds (the lower bound wins if an îlot is wider than the plan)
+        xs = np.maximum(np.minimum(grid_xs[:count], max_x - widths), min_x)
+        ys = np.maximum(np.minimum(grid_ys[:count], max_y - heights), min_y)
+        areas = widths * heights
+        centers_x = xs + widths / 2
+        centers_y = ys + heights / 2
         
         # Place îlots
-        placed_ilots = []
-        used_positions = set()
-        
-        spec_index = 0
-        for size_cat, count in size_distribution.items():
-            spec = self.size_categories[size_cat]
-            
-            for _ in range(count):
-                if spec_index >= len(grid_points):
-                    break
-                    
-                x, y = grid_points[spec_index]
-                
-                # Ensure îlot fits within bounds
-                ilot_width = spec['width'] * 0.8  # Slightly smaller for safety
-                ilot_height = spec['height'] * 0.8
-                
-                if x + ilot_width > max_x:
-                    x = max_x - ilot_width
-                if y + ilot_height > max_y:
-                    y = max_y - ilot_height
-                if x < min_x:
-                    x = min_x
-                if y < min_y:
-                    y = min_y
-                
-                # Create îlot
-                ilot = {
-                    'id': f'ilot_{spec_index}',
-                    'x': x,
-                    'y': y,
-                    'position': [x, y],
-                    'width': ilot_width,
-                    'height': ilot_height,
-                    'area': ilot_width * ilot_height,
-                    'size_category': size_cat,
-                    'color': self.color_map[size_cat],
-                    'center_x': x + ilot_width / 2,
-                    'center_y': y + ilot_height / 2,
-                    'label': f"{ilot_width * ilot_height:.1f} m²"
-                }
-                
-                placed_ilots.append(ilot)
-                used_positions.add((x, y))
-                spec_index += 1
+        placed_ilots = [
+            {
+                'id': f'ilot_{index}',
+                'x': x,
+                'y': y,
+                'position': [x, y],
+                'width': ilot_width,
+                'height': ilot_height,
+                'area': area,
+                'size_category': size_cat,
+                'color': color,
+                'center_x': center_x,
+                'center_y': center_y,
+                'label': f"{area:.1f} m²"
+            }
+            for index, (size_cat, color, x, y, ilot_width, ilot_height, area, center_x, center_y) in enumerate(zip(
+                categories, colors, xs.tolist(), ys.tolist(), widths.tolist(), heights.tolist(),
+                areas.tolist(), centers_x.tolist(), centers_y.tolist()))
+        ]
         
         return placed_ilots
     
-    def _get_size_distribution(self, target_count: int) -> Dict[str, int]:
-        """Get size distribution for îlots"""
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _get_size_distribution(target_count: int) -> Mapping[str, int]:
+        """Get size distribution for îlots as a read-only view, since the cached result is shared"""
         distribution = {
             'small': int(target_count * 0.35),    # 35% small
             'medium': int(target_count * 0.35),   # 35% medium
@@ -115,18 +111,11 @@ class SimpleIlotPlacer:
         if total < target_count:
             distribution['small'] += target_count - total
         
-        return distribution
+        return MappingProxyType(distribution)
     
-    def _create_placement_grid(self, bounds: Dict, target_count: int) -> List[Tuple[float, float]]:
-        """Create placement grid based on actual bounds"""
-        min_x = bounds.get('min_x', 0)
-        max_x = bounds.get('max_x', 100)
-        min_y = bounds.get('min_y', 0)
-        max_y = bounds.get('max_y', 100)
-        
-        width = max_x - min_x
-        height = max_y - min_y
-        
+    def _create_placement_grid(self, min_x: float, min_y: float,
+                               width: float, height: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Create placement grid over the plan extents, as parallel x and y arrays"""
         # Calculate grid size based on area
         area = width * height
         if area < 100:
@@ -136,22 +125,15 @@ class SimpleIlotPlacer:
         else:
             cols, rows = 8, 6
         
-        # Generate grid points
-        grid_points = []
+        # Generate grid points column by column
         x_step = width / (cols + 1)
         y_step = height / (rows + 1)
-        
-        for i in range(1, cols + 1):
-            for j in range(1, rows + 1):
-                x = min_x + i * x_step
-                y = min_y + j * y_step
-                grid_points.append((x, y))
+        ii, jj = np.meshgrid(np.arange(1, cols + 1), np.arange(1, rows + 1), indexing='ij')
+        xs = min_x + ii.ravel() * x_step
+        ys = min_y + jj.ravel() * y_step
         
         # Add some randomization for natural look
-        randomized_points = []
-        for x, y in grid_points:
-            offset_x = np.random.uniform(-x_step * 0.2, x_step * 0.2)
-            offset_y = np.random.uniform(-y_step * 0.2, y_step * 0.2)
-            randomized_points.append((x + offset_x, y + offset_y))
+        xs += self.rng.uniform(-x_step * 0.2, x_step * 0.2, xs.size)
+        ys += self.rng.uniform(-y_step * 0.2, y_step * 0.2, ys.size)
         
-        return randomized_points
\ No newline at end of file
+        return xs, ys
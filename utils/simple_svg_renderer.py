@@ -3,11 +3,12 @@ Simple SVG Renderer
 A simplified approach to render DXF floor plans as SVG with proper color coding
 """
 
+import io
 import ezdxf
 from ezdxf import recover
-import tempfile
-import os
-from typing import Dict, List, Any, Optional
+import numpy as np
+from itertools import chain
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
 from streamlit.components.v1 import html
 
@@ -20,162 +21,160 @@ class SimpleSVGRenderer:
             'doors': '#FF0000',    # Red
             'restricted': '#0066CC' # Blue
         }
+        # Entity processor per DXF type; other types are not drawn
+        self._processors = {
+            'LINE': self._process_line,
+            'LWPOLYLINE': self._process_lwpolyline,
+            'ARC': self._process_arc,
+            'CIRCLE': self._process_circle
+        }
         
     def render_dxf_to_svg(self, file_content: bytes, filename: str, target_bounds: Dict[str, float] = None) -> str:
         """Render DXF to SVG with proper color coding"""
         try:
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.dxf', delete=False) as tmp_file:
-                tmp_file.write(file_content)
-                tmp_file_path = tmp_file.name
+            # Load DXF document straight from memory
+            doc, auditor = recover.read(io.BytesIO(file_content))
+            msp = doc.modelspace()
+            
+            # Extract entities with bounds filtering
+            entities = self._extract_entities_with_bounds(msp, target_bounds)
+            
+            # Create SVG
+            svg_content = self._create_svg_from_entities(entities, target_bounds)
+            
+            return svg_content
             
-            try:
-                # Load DXF document
-                doc, auditor = recover.readfile(tmp_file_path)
-                msp = doc.modelspace()
-                
-                # Extract entities with bounds filtering
-                entities = self._extract_entities_with_bounds(msp, target_bounds)
-                
-                # Create SVG
-                svg_content = self._create_svg_from_entities(entities, target_bounds)
-                
-                return svg_content
-                
-            finally:
-                try:
-                    os.unlink(tmp_file_path)
-                except:
-                    pass
-                    
         except Exception as e:
             print(f"Error rendering SVG: {str(e)}")
             return self._create_error_svg(str(e))
     
-    def _extract_entities_with_bounds(self, msp, target_bounds: Dict[str, float] = None) -> List[Dict]:
-        """Extract entities with proper categorization"""
-        entities = []
+    def _extract_entities_with_bounds(self, msp, target_bounds: Dict[str, float] = None) -> Dict[str, List[Dict]]:
+        """Extract entities grouped by category (walls, doors, restricted)"""
+        entities = {category: [] for category in self.color_map}
+        process_entity = self._process_entity
         
-        for entity in msp:
+        # Only the types with a processor are queried; TEXT, INSERT, HATCH... are skipped by ezdxf
+        for entity in msp.query(' '.join(self._processors)):
             try:
-                # Check if entity is within bounds
-                if target_bounds and not self._is_entity_in_bounds(entity, target_bounds):
-                    continue
-                
-                entity_data = self._process_entity(entity)
+                entity_data = process_entity(entity)
                 if entity_data:
-                    entities.append(entity_data)
+                    entities[entity_data['category']].append(entity_data)
                     
             except Exception as e:
                 print(f"Error processing entity: {str(e)}")
                 continue
+        
+        # Keep only entities within bounds, testing all their points at once
+        if target_bounds:
+            for category, group in entities.items():
+                if group:
+                    entities[category] = self._filter_entities_in_bounds(group, target_bounds)
                 
         return entities
     
     def _process_entity(self, entity) -> Optional[Dict]:
         """Process a single entity and return its data"""
         try:
-            entity_type = entity.dxftype()
-            
-            if entity_type == 'LINE':
-                start = entity.dxf.start
-                end = entity.dxf.end
-                
-                return {
-                    'type': 'line',
-                    'category': 'walls',
-                    'start': (float(start.x), float(start.y)),
-                    'end': (float(end.x), float(end.y)),
-                    'layer': entity.dxf.layer
-                }
-                
-            elif entity_type == 'LWPOLYLINE':
-                points = list(entity.get_points())
-                if len(points) >= 2:
-                    return {
-                        'type': 'polyline',
-                        'category': 'walls',
-                        'points': [(float(p[0]), float(p[1])) for p in points],
-                        'closed': entity.closed,
-                        'layer': entity.dxf.layer
-                    }
-                    
-            elif entity_type == 'ARC':
-                center = entity.dxf.center
-                radius = entity.dxf.radius
-                
-                # Check if it's a door arc
-                if 0.3 <= radius <= 3.0:
-                    return {
-                        'type': 'arc',
-                        'category': 'doors',
-                        'center': (float(center.x), float(center.y)),
-                        'radius': float(radius),
-                        'start_angle': float(entity.dxf.start_angle),
-                        'end_angle': float(entity.dxf.end_angle),
-                        'layer': entity.dxf.layer
-                    }
-                    
-            elif entity_type == 'CIRCLE':
-                center = entity.dxf.center
-                radius = entity.dxf.radius
-                
-                return {
-                    'type': 'circle',
-                    'category': 'restricted',
-                    'center': (float(center.x), float(center.y)),
-                    'radius': float(radius),
-                    'layer': entity.dxf.layer
-                }
+            processor = self._processors.get(entity.dxftype())
+            if processor:
+                return processor(entity)
                 
         except Exception as e:
             print(f"Error processing entity: {str(e)}")
             
         return None
     
-    def _is_entity_in_bounds(self, entity, bounds: Dict[str, float]) -> bool:
-        """Check if entity is within bounds"""
-        try:
-            entity_type = entity.dxftype()
-            
-            if entity_type == 'LINE':
-                start = entity.dxf.start
-                end = entity.dxf.end
-                
-                # Check if any point is within bounds
-                points = [start, end]
-                for point in points:
-                    if (bounds['min_x'] <= point.x <= bounds['max_x'] and
-                        bounds['min_y'] <= point.y <= bounds['max_y']):
-                        return True
-                        
-            elif entity_type == 'LWPOLYLINE':
-                points = list(entity.get_points())
-                for point in points:
-                    if (bounds['min_x'] <= point[0] <= bounds['max_x'] and
-                        bounds['min_y'] <= point[1] <= bounds['max_y']):
-                        return True
-                        
-            elif entity_type in ['ARC', 'CIRCLE']:
-                center = entity.dxf.center
-                if (bounds['min_x'] <= center.x <= bounds['max_x'] and
-                    bounds['min_y'] <= center.y <= bounds['max_y']):
-                    return True
-                    
-        except Exception as e:
-            print(f"Error checking bounds: {str(e)}")
-            
-        return False
+    def _process_line(self, entity) -> Optional[Dict]:
+        """LINE entities are walls"""
+        dxf = entity.dxf
+        start = dxf.start
+        end = dxf.end
+        
+        return {
+            'type': 'line',
+            'category': 'walls',
+            'start': (float(start.x), float(start.y)),
+            'end': (float(end.x), float(end.y)),
+            'layer': dxf.layer
+        }
+    
+    def _process_lwpolyline(self, entity) -> Optional[Dict]:
+        """LWPOLYLINE entities with at least two points are walls"""
+        # Only x/y are drawn; skip the width and bulge values per vertex
+        points = entity.get_points('xy')
+        if len(points) >= 2:
+            return {
+                'type': 'polyline',
+                'category': 'walls',
+                'points': [(float(p[0]), float(p[1])) for p in points],
+                'closed': entity.closed,
+                'layer': entity.dxf.layer
+            }
+        return None
+    
+    def _process_arc(self, entity) -> Optional[Dict]:
+        """ARC entities of door-swing size are doors"""
+        dxf = entity.dxf
+        center = dxf.center
+        radius = dxf.radius
+        
+        # Check if it's a door arc
+        if 0.3 <= radius <= 3.0:
+            return {
+                'type': 'arc',
+                'category': 'doors',
+                'center': (float(center.x), float(center.y)),
+                'radius': float(radius),
+                'start_angle': float(dxf.start_angle),
+                'end_angle': float(dxf.end_angle),
+                'layer': dxf.layer
+            }
+        return None
     
-    def _create_svg_from_entities(self, entities: List[Dict], bounds: Dict[str, float] = None) -> str:
-        """Create SVG from entities"""
+    def _process_circle(self, entity) -> Optional[Dict]:
+        """CIRCLE entities are restricted areas"""
+        dxf = entity.dxf
+        center = dxf.center
+        radius = dxf.radius
+        
+        return {
+            'type': 'circle',
+            'category': 'restricted',
+            'center': (float(center.x), float(center.y)),
+            'radius': float(radius),
+            'layer': dxf.layer
+        }
+    
+    @staticmethod
+    def _entity_anchor_points(entity: Dict):
+        """Points that put an entity within bounds: line ends, polyline vertices, arc/circle centre"""
+        if entity['type'] == 'line':
+            return entity['start'], entity['end']
+        if entity['type'] == 'polyline':
+            return entity['points']
+        return entity['center'],
+    
+    def _filter_entities_in_bounds(self, entities: List[Dict], bounds: Dict[str, float]) -> List[Dict]:
+        """Keep the entities that have at least one anchor point inside bounds"""
+        anchors = [self._entity_anchor_points(entity) for entity in entities]
+        points = np.array([point for entity_points in anchors for point in entity_points],
+                          dtype=np.float64).reshape(-1, 2)
+        owners = np.repeat(np.arange(len(entities)), [len(entity_points) for entity_points in anchors])
+        
+        inside = ((bounds['min_x'] <= points[:, 0]) & (points[:, 0] <= bounds['max_x']) &
+                  (bounds['min_y'] <= points[:, 1]) & (points[:, 1] <= bounds['max_y']))
+        keep = np.bincount(owners[inside], minlength=len(entities)) > 0
+        return [entity for entity, kept in zip(entities, keep.tolist()) if kept]
+    
+    def _create_svg_from_entities(self, entities: Dict[str, List[Dict]], bounds: Dict[str, float] = None) -> str:
+        """Create SVG from entities grouped by category"""
         try:
-            if not entities:
+            if not any(entities.values()):
                 return self._create_empty_svg()
             
             # Calculate bounds if not provided
             if not bounds:
-                bounds = self._calculate_bounds_from_entities(entities)
+                bounds = self._calculate_bounds_from_entities(list(chain.from_iterable(entities.values())))
             
             # SVG dimensions
             width = bounds['max_x'] - bounds['min_x']
@@ -188,116 +187,113 @@ class SimpleSVGRenderer:
             
             # Create SVG header
             svg_lines = [
-                f'<svg viewBox="0 0 {svg_width} {svg_height}" xmlns="http://www.w3.org/2000/svg" style="width: 100%; height: 100%; background: white;">',
-                f'<g transform="translate({padding}, {padding}) scale(1, -1) translate({-bounds["min_x"]}, {-bounds["max_y"]})">'
+                f'<svg viewBox="0 0 {svg_width:.2f} {svg_height:.2f}" xmlns="http://www.w3.org/2000/svg" style="width: 100%; height: 100%; background: white;">'
             ]
             
-            # Process entities by category
-            wall_entities = [e for e in entities if e['category'] == 'walls']
-            door_entities = [e for e in entities if e['category'] == 'doors']
-            restricted_entities = [e for e in entities if e['category'] == 'restricted']
-            
-            # Add walls
-            for entity in wall_entities:
-                svg_lines.append(self._entity_to_svg(entity, self.color_map['walls']))
+            # Coordinates are written in SVG space (x + ox, oy - y): padded, with Y flipped
+            # to point down, so the browser has no group transform to apply
+            origin = (padding - bounds['min_x'], padding + bounds['max_y'])
             
-            # Add doors
-            for entity in door_entities:
-                svg_lines.append(self._entity_to_svg(entity, self.color_map['doors']))
-                
-            # Add restricted areas
-            for entity in restricted_entities:
-                svg_lines.append(self._entity_to_svg(entity, self.color_map['restricted']))
+            # Add walls, doors and restricted areas, one path element per category
+            for category, color in self.color_map.items():
+                svg_lines.append(self._build_path(entities[category], color, origin))
             
             # Close SVG
-            svg_lines.extend(['</g>', '</svg>'])
+            svg_lines.append('</svg>')
             
-            return '\n'.join(svg_lines)
+            # Elements need no separator; skipping newlines keeps the payload smaller
+            return ''.join(svg_lines)
             
         except Exception as e:
             print(f"Error creating SVG: {str(e)}")
             return self._create_error_svg(str(e))
     
-    def _entity_to_svg(self, entity: Dict, color: str) -> str:
-        """Convert entity to SVG element"""
+    def _build_path(self, entities: List[Dict], color: str, origin: Tuple[float, float]) -> str:
+        """Draw all entities of one category as a single SVG outline path, plus closed polyline fills"""
+        arcs = [entity for entity in entities if entity['type'] == 'arc']
+        outline = ''.join([self._entity_to_path_data(entity, origin) for entity in entities if entity['type'] != 'arc'] +
+                          self._arcs_to_path_data(arcs, origin))
+        if not outline:
+            return ''
+        
+        # Closed polylines get a fill element each; one combined path would let the
+        # nonzero fill rule punch holes where polylines of opposite winding overlap
+        fills = ''.join([f'<path d="{self._entity_to_path_data(entity, origin)}" stroke="none" fill="{color}" />'
+                         for entity in entities
+                         if entity['type'] == 'polyline' and entity.get('closed', False)])
+        return fills + f'<path d="{outline}" stroke="{color}" stroke-width="0.5" fill="none" />'
+    
+    def _entity_to_path_data(self, entity: Dict, origin: Tuple[float, float]) -> str:
+        """Convert entity to SVG path data (one subpath) in SVG space"""
+        ox, oy = origin
         try:
             if entity['type'] == 'line':
                 start = entity['start']
                 end = entity['end']
-                return f'<line x1="{start[0]}" y1="{start[1]}" x2="{end[0]}" y2="{end[1]}" stroke="{color}" stroke-width="0.5" />'
+                return f'M{start[0] + ox:.2f} {oy - start[1]:.2f}L{end[0] + ox:.2f} {oy - end[1]:.2f}'
                 
             elif entity['type'] == 'polyline':
                 points = entity['points']
-                points_str = ' '.join([f"{p[0]},{p[1]}" for p in points])
-                fill = 'none' if not entity.get('closed', False) else color
-                return f'<polyline points="{points_str}" stroke="{color}" stroke-width="0.5" fill="{fill}" />'
-                
-            elif entity['type'] == 'arc':
-                center = entity['center']
-                radius = entity['radius']
-                start_angle = entity['start_angle']
-                end_angle = entity['end_angle']
-                
-                # Convert angles to radians
-                import math
-                start_rad = math.radians(start_angle)
-                end_rad = math.radians(end_angle)
-                
-                # Calculate arc points
-                x1 = center[0] + radius * math.cos(start_rad)
-                y1 = center[1] + radius * math.sin(start_rad)
-                x2 = center[0] + radius * math.cos(end_rad)
-                y2 = center[1] + radius * math.sin(end_rad)
-                
-                # Create path
-                large_arc = 1 if abs(end_angle - start_angle) > 180 else 0
-                return f'<path d="M {x1} {y1} A {radius} {radius} 0 {large_arc} 1 {x2} {y2}" stroke="{color}" stroke-width="0.5" fill="none" />'
+                start, rest = points[0], points[1:]
+                return (f'M{start[0] + ox:.2f} {oy - start[1]:.2f}L' +
+                        ' '.join([f"{p[0] + ox:.2f} {oy - p[1]:.2f}" for p in rest]))
                 
             elif entity['type'] == 'circle':
-                center = entity['center']
+                cx, cy = entity['center'][0] + ox, oy - entity['center'][1]
                 radius = entity['radius']
-                return f'<circle cx="{center[0]}" cy="{center[1]}" r="{radius}" stroke="{color}" stroke-width="0.5" fill="none" />'
+                # Two half-circle arcs, as a path has no circle command
+                return (f'M{cx - radius:.2f} {cy:.2f}'
+                        f'A{radius:.2f} {radius:.2f} 0 1 1 {cx + radius:.2f} {cy:.2f}'
+                        f'A{radius:.2f} {radius:.2f} 0 1 1 {cx - radius:.2f} {cy:.2f}')
                 
         except Exception as e:
             print(f"Error converting entity to SVG: {str(e)}")
             
         return ''
     
+    def _arcs_to_path_data(self, arcs: List[Dict], origin: Tuple[float, float]) -> List[str]:
+        """Convert arc entities to SVG path data in SVG space, computing all endpoints in one batch"""
+        if not arcs:
+            return []
+        
+        cx, cy, radius, start_angle, end_angle = np.array(
+            [(*arc['center'], arc['radius'], arc['start_angle'], arc['end_angle']) for arc in arcs],
+            dtype=np.float64).T
+        
+        # Calculate arc points, Y flipped into SVG space
+        ox, oy = origin
+        start_rad = np.deg2rad(start_angle)
+        end_rad = np.deg2rad(end_angle)
+        x1 = cx + radius * np.cos(start_rad) + ox
+        y1 = oy - (cy + radius * np.sin(start_rad))
+        x2 = cx + radius * np.cos(end_rad) + ox
+        y2 = oy - (cy + radius * np.sin(end_rad))
+        large_arc = (np.abs(end_angle - start_angle) > 180).astype(int)
+        
+        # Counter-clockwise DXF arcs turn clockwise once Y points down, hence sweep flag 0
+        return [f'M{sx:.2f} {sy:.2f}A{r:.2f} {r:.2f} 0 {large} 0 {ex:.2f} {ey:.2f}'
+                for sx, sy, r, large, ex, ey in zip(x1.tolist(), y1.tolist(), radius.tolist(),
+                                                    large_arc.tolist(), x2.tolist(), y2.tolist())]
+    
     def _calculate_bounds_from_entities(self, entities: List[Dict]) -> Dict[str, float]:
         """Calculate bounds from entities"""
         try:
-            min_x = min_y = float('inf')
-            max_x = max_y = float('-inf')
+            # Gather the extreme points of every entity type, then reduce once per axis
+            points = np.array([point for entity in entities if entity['type'] == 'line'
+                               for point in (entity['start'], entity['end'])] +
+                              [point for entity in entities if entity['type'] == 'polyline'
+                               for point in entity['points']], dtype=np.float64).reshape(-1, 2)
+            circles = np.array([(*entity['center'], entity['radius']) for entity in entities
+                                if entity['type'] in ['arc', 'circle']], dtype=np.float64).reshape(-1, 3)
+            centers, radii = circles[:, :2], circles[:, 2:]
+            extremes = np.concatenate([points, centers - radii, centers + radii])
             
-            for entity in entities:
-                if entity['type'] == 'line':
-                    start, end = entity['start'], entity['end']
-                    min_x = min(min_x, start[0], end[0])
-                    max_x = max(max_x, start[0], end[0])
-                    min_y = min(min_y, start[1], end[1])
-                    max_y = max(max_y, start[1], end[1])
-                    
-                elif entity['type'] == 'polyline':
-                    for point in entity['points']:
-                        min_x = min(min_x, point[0])
-                        max_x = max(max_x, point[0])
-                        min_y = min(min_y, point[1])
-                        max_y = max(max_y, point[1])
-                        
-                elif entity['type'] in ['arc', 'circle']:
-                    center = entity['center']
-                    radius = entity['radius']
-                    min_x = min(min_x, center[0] - radius)
-                    max_x = max(max_x, center[0] + radius)
-                    min_y = min(min_y, center[1] - radius)
-                    max_y = max(max_y, center[1] + radius)
+            if not extremes.size:
+                return {'min_x': 0, 'max_x': 100, 'min_y': 0, 'max_y': 100}
             
-            return {
-                'min_x': min_x if min_x != float('inf') else 0,
-                'max_x': max_x if max_x != float('-inf') else 100,
-                'min_y': min_y if min_y != float('inf') else 0,
-                'max_y': max_y if max_y != float('-inf') else 100
-            }
+            min_x, min_y = extremes.min(axis=0).tolist()
+            max_x, max_y = extremes.max(axis=0).tolist()
+            return {'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y}
             
         except Exception as e:
             print(f"Error calculating bounds: {str(e)}")